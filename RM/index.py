@@ -2,207 +2,25 @@
 # Importación de librerías
 # =============================
 
-import pandas as pd
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 import os
 import subprocess
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Border, Side, Font, Alignment, numbers
-from openpyxl.utils import get_column_letter
-from openpyxl.chart import BarChart, Reference
+
+# Motor compartido (carpeta raíz del proyecto)
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motor.arranque import precalentar
+from motor.servicio import transformador
+from motor.transformador import transformar_excel as transformar_perfil
+from motor.trabajador import Trabajador, describir_progreso, resumir_reporte
                                                                                                                                                     
 # =============================
 # Función de transformación principal
 # =============================
-def transformar_excel(ruta_entrada, ruta_salida):
-    # Leer datos
-    df = pd.read_excel(ruta_entrada)
-
-    # Filtrar filas con Importe negativo
-    df = df[~df['Importe'].astype(str).str.contains('-', na=False)]
-
-    # Propagar Asiento contable y Fecha a filas de detalle
-    df['Asiento contable'] = df['Asiento contable'].ffill()
-    df['Fecha'] = df['Fecha'].ffill()
-
-    # Auxiliares minúsculas para búsqueda
-    df['linea'] = df['Líneas de factura'].fillna('').astype(str).str.lower()
-    df['partner'] = df['Partner'].fillna('').astype(str).str.lower()
-
-    # Mapeo de palabras clave a referencias
-    
-    keywords_map = {
-        'Facta': ['facta'],
-        'Master': ['max'],
-        'Almacen': ['alm', 'almacen'],
-        'Comision': ['comision', 'b/2025'],
-        'Submarcell': ['submr'],
-        'Linea 9': ['linea 9', 'línea 9'],
-        'Caja de cobro': ['caja de cobro'],
-        'Traspaso': ['traspaso'],
-        'SAT': ['sat', 'servicio de administracion', 'servicios de administracion']
-    }
-
-    
-
-    def clasificar_asiento(grupo):
-        res = {}
-        res['Día'] = pd.to_datetime(grupo['Fecha'].iloc[0]).date()
-        res['Concepto / Referencia'] = grupo['Líneas de factura'].iloc[0]
-        res['cargo'] = ""
-        res['Abono'] = grupo['Importe'].sum()
-        res['Referencia'] = grupo['Referencia'].iloc[0]
-        # Clasificación
-        for col, keys in keywords_map.items():
-            mask = grupo.apply(lambda r: any(kw in r['linea'] for kw in keys)
-                                or any(kw in r['partner'] for kw in keys), axis=1)
-            if col == 'Traspaso':
-                res[col] = grupo.loc[mask, 'Líneas de factura/Débito'].sum()
-            else:
-                res[col] = grupo.loc[mask, 'Líneas de factura/Débito'].sum() + grupo.loc[mask, 'Líneas de factura/Crédito'].sum()
-     
-        # Otros y Redond (resumen de montos no clasificados y ajuste por redondeo)
-        # 1. suma_clas: suma de todos los importes asignados a categorías
-        suma_clas = sum(res[c] for c in keywords_map)
-        # 2. base: monto total de la transacción (Abono, ya que cargo se fija en 0)
-        base = res['Abono']
-        # 3. Redond: diferencia entre el monto total y la suma clasificada
-        res['Redond'] = base - suma_clas 
-        
-        # Cálculo correcto de Saldo: Abono menos todas las categorías
-        res['Saldo'] = res['Abono'] - sum(res[c] for c in keywords_map) - res['Redond']
-        
-        return pd.Series(res)
-
-    # Agrupar y obtener DF final
-    df_grouped = df.groupby('Asiento contable', dropna=False).apply(clasificar_asiento).reset_index(drop=True)
-    df_grouped.insert(0, '#', range(1, len(df_grouped) + 1))
-    # Totales
-    total = {c: df_grouped[c].sum() if pd.api.types.is_numeric_dtype(df_grouped[c]) else ''
-        for c in df_grouped.columns}
-    total['Concepto / Referencia'] = 'TOTAL'
-    df_grouped = pd.concat([df_grouped, pd.DataFrame([total])], ignore_index=True)
-
-    # Exportar preliminar
-    df_grouped.to_excel(ruta_salida, index=False)
-
-    # ========================
-    # Estilos y gráficos
-    # ========================
-    wb = load_workbook(ruta_salida)
-    ws = wb.active
-
-    # Cabecera
-    header_fill = PatternFill('solid', start_color='4472C4', end_color='4472C4')
-    header_font = Font(color='FFFFFF', bold=True)
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-
-    # Freeze y autofiltro
-    ws.freeze_panes = 'B2'
-    ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}1"
-    
-    # Auto-ajustar anchos de columna
-    for col_cells in ws.columns:
-        max_length = max((len(str(cell.value)) for cell in col_cells if cell.value), default=0)
-        ws.column_dimensions[col_cells[0].column_letter].width = max_length + 2
-
-    # Colores por categoría
-    palette = ['D9EAD3','FCE5CD','D0E0E3','EAD1DC','FFF2CC','C9DAF8','E2EFDA','E6B8B7',
-            'FFD966','B6D7A8','EA9999','A4C2F4','D5A6BD','B7DEE8']
-    color_map = {col: PatternFill('solid', start_color=palette[i % len(palette)],
-                end_color=palette[i % len(palette)])
-                for i, col in enumerate(keywords_map)}
-
-    # Resaltar montos clasificados
-    for idx, col in enumerate(df_grouped.columns, start=1):
-        if col in color_map:
-            for r in range(2, ws.max_row):
-                cell = ws.cell(r, idx)
-                if cell.value not in (None, 0, ''):
-                    cell.fill = color_map[col]
-
-    # Encontrar índices de columnas importantes
-    concepto_ref_idx = None
-    abono_idx = None
-    redond_idx = None
-    
-    for idx, col in enumerate(df_grouped.columns, start=1):
-        if col == 'Concepto / Referencia':
-            concepto_ref_idx = idx
-        elif col == 'Abono':
-            abono_idx = idx
-        elif col == 'Redond':
-            redond_idx = idx
-    
-    # Colores personalizados
-    deposito_fill = PatternFill('solid', start_color='FFCCCC', end_color='FFCCCC')  # Rosado
-    traspaso_fill = PatternFill('solid', start_color='CCFFCC', end_color='CCFFCC')  # Verde
-    abono_fill = PatternFill('solid', start_color='CCE5FF', end_color='CCE5FF')     # Azul
-    
-    # Aplicar formatos especiales
-    for r in range(2, ws.max_row + 1):
-        # Formatear números con separador de miles
-        for c in range(1, ws.max_column + 1):
-            cell = ws.cell(r, c)
-            if isinstance(cell.value, (int, float)):
-                cell.number_format = '#,##0.00'
-        
-        # Aplicar colores específicos
-        if concepto_ref_idx:
-            concepto_valor = str(ws.cell(r, concepto_ref_idx).value).lower()
-            if 'deposito en efectivo' in concepto_valor:
-                ws.cell(r, concepto_ref_idx).fill = deposito_fill
-            elif 'traspaso' in concepto_valor:
-                ws.cell(r, concepto_ref_idx).fill = traspaso_fill
-        
-        # Columna Abono en azul
-        if abono_idx:
-            ws.cell(r, abono_idx).fill = abono_fill
-        
-        # Redond negativo en rojo
-        if redond_idx:
-            redond_cell = ws.cell(r, redond_idx)
-            if isinstance(redond_cell.value, (int, float)) and redond_cell.value < 0:
-                redond_cell.font = Font(color='FF0000')
-            if isinstance(redond_cell.value, (int, float)) and redond_cell.value > 0: redond_cell.font = Font(color='000000')
-            if isinstance(redond_cell.value, (int, float)) and redond_cell.value == 0: redond_cell.font = Font(color='FFFFFF')
-            
-    
-    # Sombreado alternado para filas (solo celdas sin estilo previo)
-    alt_fill = PatternFill('solid', start_color='F2F2F2', end_color='F2F2F2')
-    total_row = ws.max_row
-    for r in range(2, total_row):
-        if r % 2 == 0:
-            for c in range(1, ws.max_column + 1):
-                cell = ws.cell(r, c)
-                if cell.fill.fill_type is None:
-                    cell.fill = alt_fill
-
-    # Línea separadora entre fechas
-    border = Border(bottom=Side(style='thin', color='000000'))
-    last = None
-    for r in range(2, ws.max_row):
-        curr = ws.cell(r, 2).value
-        if last and curr != last:
-            for c in range(1, ws.max_column + 1):
-                ws.cell(r - 1, c).border = border
-        last = curr
-
-    # Estilo TOTAL
-    total_fill = PatternFill('solid', start_color='F4CCCC', end_color='F4CCCC')
-    for c in range(1, ws.max_column + 1):
-        cell = ws.cell(ws.max_row, c)
-        cell.fill = total_fill
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-
-  
-
-    wb.save(ruta_salida)
+def transformar_excel(ruta_entrada, ruta_salida, guardar_reporte=False, progreso=None, usar_cache=True):
+    """Transformación con el perfil 'rm' (palabras clave y reglas en motor/perfiles.py)."""
+    return transformar_perfil('rm', ruta_entrada, ruta_salida, guardar_reporte, progreso, usar_cache)
 
 # =============================
 # Interfaz gráfica Tkinter
@@ -215,7 +33,13 @@ class App:
         self.root.configure(bg='#181a20')  # Fondo más oscuro
         self.ruta_entrada = ''
         self.ruta_salida = ''
+        # Transformaciones en segundo plano para no congelar la ventana (en el
+        # servicio local si TRANSFORMADOR_SERVICIO está definido)
+        self.trabajador = Trabajador(transformador('rm', transformar_excel))
         self.build_ui()
+        # Importa pandas/openpyxl mientras el usuario elige el archivo
+        precalentar()
+        self.root.after(100, self.revisar_eventos)
 
     def build_ui(self):
         # Título
@@ -285,6 +109,29 @@ class App:
         )
         self.label_guardado.pack(fill="x")
 
+        # Progreso de la transformación en curso
+        progreso_frame = tk.Frame(msg_frame, bg="#181a20")
+        progreso_frame.pack(fill="x", pady=(4, 0))
+
+        self.barra_progreso = ttk.Progressbar(progreso_frame, mode="determinate", maximum=100)
+        self.barra_progreso.pack(side="left", fill="x", expand=True)
+
+        self.btn_cancelar = tk.Button(
+            progreso_frame, text="✖ Cancelar", font=("Segoe UI", 10, "bold"),
+            bg="#d63031", fg="#f1f2f6", activebackground="#ff7675", activeforeground="#23272e",
+            command=self.cancelar, bd=0, relief="ridge", cursor="hand2", state=tk.DISABLED
+        )
+        self.btn_cancelar.default_bg = "#d63031"
+        self.btn_cancelar.bind("<Enter>", on_enter)
+        self.btn_cancelar.bind("<Leave>", on_leave)
+        self.btn_cancelar.pack(side="left", padx=(8, 0))
+
+        self.label_progreso = tk.Label(
+            msg_frame, text="",
+            font=("Segoe UI", 9), bg="#181a20", fg="#b2bec3", anchor="w", wraplength=600
+        )
+        self.label_progreso.pack(fill="x")
+
         # Pie de página
         footer = tk.Label(
             self.root, text="© 2025 Rosa Marcela", font=("Segoe UI", 9),
@@ -318,22 +165,59 @@ class App:
             return
         ruta = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Archivos Excel","*.xlsx")])
         if ruta:
-            try:
-                transformar_excel(self.ruta_entrada, ruta)
-                self.ruta_salida = ruta
+            # Se encola; mientras tanto se puede cargar y encolar el siguiente archivo
+            self.trabajador.encolar(self.ruta_entrada, ruta)
+            self.label_guardado.config(
+                text=f"⏳ En cola: {os.path.basename(ruta)}",
+                fg="#74b9ff"  # Azul claro
+            )
+
+    def cancelar(self):
+        self.trabajador.cancelar()
+        self.label_progreso.config(text="Cancelando...")
+
+    def revisar_eventos(self):
+        # Eventos del hilo trabajador (Tk solo se toca desde el hilo principal)
+        while not self.trabajador.eventos.empty():
+            evento = self.trabajador.eventos.get_nowait()
+            tipo, salida = evento[0], evento[1][1]
+            nombre = os.path.basename(salida)
+            if tipo == 'inicio':
+                self.barra_progreso['value'] = 0
+                self.btn_cancelar.config(state=tk.NORMAL)
+                self.label_guardado.config(text=f"⚙️ Generando: {nombre}", fg="#74b9ff")
+            elif tipo == 'progreso':
+                porcentaje, texto = describir_progreso(*evento[2:])
+                self.barra_progreso['value'] = porcentaje
+                pendientes = self.trabajador.pendientes()
+                self.label_progreso.config(text=texto + (f"  ({pendientes} en cola)" if pendientes else ""))
+            elif tipo == 'ok':
+                self.ruta_salida = salida
+                self.barra_progreso['value'] = 100
+                self.btn_cancelar.config(state=tk.DISABLED)
+                self.label_progreso.config(text=resumir_reporte(evento[2]))
                 self.label_guardado.config(
-                    text=f"✅ Generado: {os.path.basename(ruta)}",
+                    text=f"✅ Generado: {nombre}",
                     fg="#00e676"  # Verde brillante
                 )
                 self.btn_abrir.config(state=tk.NORMAL)  # Habilita el botón
                 messagebox.showinfo("✅ Éxito","Archivo creado y estilizado.")
-            except Exception as e:
+            elif tipo == 'cancelado':
+                self.barra_progreso['value'] = 0
+                self.btn_cancelar.config(state=tk.DISABLED)
+                self.label_progreso.config(text="")
+                self.label_guardado.config(text=f"⛔ Cancelado: {nombre}", fg="#fdcb6e")
+            elif tipo == 'error':
+                self.barra_progreso['value'] = 0
+                self.btn_cancelar.config(state=tk.DISABLED)
+                self.label_progreso.config(text="")
                 self.label_guardado.config(
-                    text=f"❌ Error: {str(e)}",
+                    text=f"❌ Error: {evento[2]}",
                     fg="#ff7675"  # Rojo claro
                 )
                 self.btn_abrir.config(state=tk.DISABLED)  # Deshabilita el botón en caso de error
-                messagebox.showerror("❌ Error", str(e))
+                messagebox.showerror("❌ Error", evento[2])
+        self.root.after(100, self.revisar_eventos)
 
     def abrir_archivo(self):
         if self.ruta_salida and os.path.exists(self.ruta_salida):
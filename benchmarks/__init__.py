@@ -0,0 +1,3 @@
+# =============================
+# Benchmarks de los transformadores
+# =============================
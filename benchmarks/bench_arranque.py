@@ -0,0 +1,76 @@
+# =============================
+# Benchmark de arranque de las interfaces
+# =============================
+# Uso:
+#   python -m benchmarks.bench_arranque
+#   python -m benchmarks.bench_arranque --limite 0.5 --repeticiones 5
+#
+# Mide, en un intérprete nuevo, cuánto tarda en importarse cada punto de
+# entrada (sin crear la ventana) y qué módulos pesados quedan cargados.
+# Termina con código 1 si alguno importa pandas/openpyxl al arrancar o
+# pasa de --limite segundos, para usarlo como verificación.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRADAS = {
+    'main': os.path.join(RAIZ, 'main.py'),
+    'rm': os.path.join(RAIZ, 'RM', 'index.py'),
+    'tcomunicamos': os.path.join(RAIZ, 'tcomunicamos', 'indext.py'),
+}
+
+# Lo que no debe importarse antes de la primera transformación
+PESADOS = ['pandas', 'numpy', 'openpyxl']
+
+# Se ejecuta en el proceso hijo; imprime un JSON con el resultado
+_SONDA = '''
+import importlib.util, json, sys, time
+inicio = time.perf_counter()
+spec = importlib.util.spec_from_file_location('entrada', sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+segundos = time.perf_counter() - inicio
+print(json.dumps({'segundos': segundos,
+                  'pesados': [m for m in sys.argv[2:] if m in sys.modules]}))
+'''
+
+
+def medir_arranque(ruta):
+    """Importa ruta en un intérprete nuevo y devuelve segundos y módulos pesados cargados."""
+    salida = subprocess.run([sys.executable, '-c', _SONDA, ruta, *PESADOS], cwd=RAIZ,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de las interfaces Tk.')
+    parser.add_argument('--entradas', nargs='+', choices=sorted(ENTRADAS), default=list(ENTRADAS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--limite', type=float, help='Segundos máximos de importación por entrada')
+    parser.add_argument('--salida', help='Archivo JSON de resultados')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    fallas = 0
+    for nombre in args.entradas:
+        # Mejor de N corridas
+        corridas = [medir_arranque(ENTRADAS[nombre]) for _ in range(args.repeticiones)]
+        mejor = min(corridas, key=lambda c: c['segundos'])
+        resultados[nombre] = mejor
+        lento = args.limite is not None and mejor['segundos'] > args.limite
+        fallas += bool(mejor['pesados']) or lento
+        pesados = ', '.join(mejor['pesados']) or 'ninguno'
+        print(f"{nombre:>12}: {mejor['segundos']:.3f} s | pesados al arrancar: {pesados}"
+              + (' | LENTO' if lento else ''), flush=True)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
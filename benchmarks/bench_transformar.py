@@ -0,0 +1,137 @@
+# =============================
+# Benchmark por etapas de transformar_excel
+# =============================
+# Uso:
+#   python -m benchmarks.bench_transformar
+#   python -m benchmarks.bench_transformar --tamanos 1000 10000 --empresas rm
+#   python -m benchmarks.bench_transformar --comparar benchmarks/resultados/abc1234.json
+#
+# Los archivos sintéticos se guardan en benchmarks/datos/ y se reutilizan.
+# Cada medición corre en un proceso nuevo para que el pico de memoria sea
+# el de esa corrida.
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.generar import generar_estado
+
+DATOS = os.path.join(RAIZ, 'benchmarks', 'datos')
+RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+# Etapas de transformar_excel en el orden en que ocurren
+ETAPAS = ['lectura', 'filtrado', 'clasificacion', 'agrupacion', 'totales', 'exportacion']
+
+
+def medir(empresa, ruta_entrada):
+    """Corre transformar_excel una vez y devuelve los tiempos por etapa de su reporte."""
+    from motor.lote import cargar_transformador
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_salida = os.path.join(tmp, 'salida.xlsx')
+        # Sin caché de resultados: se mide la transformación completa
+        reporte = cargar_transformador(empresa)(ruta_entrada, ruta_salida, usar_cache=False)
+        tamano_salida = os.path.getsize(ruta_salida)
+
+    return {
+        'etapas': {e: reporte['etapas'][e]['segundos'] for e in ETAPAS},
+        'detalle': reporte['etapas'],
+        'total_s': reporte['total_s'],
+        'pico_rss_mb': reporte['pico_rss_mb'],
+        'salida_bytes': tamano_salida,
+    }
+
+
+def _medir_aislado(empresa, ruta_entrada):
+    # Proceso nuevo por medición (spawn funciona igual en Windows y Linux)
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(medir, empresa, ruta_entrada).result()
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def ejecutar(empresas, tamanos, repeticiones=1, filas_por_asiento=4, tasa_clave=0.7):
+    import pandas as pd
+    from motor.lectura import motor_lectura
+
+    reporte = {
+        'commit': _commit_actual(),
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'motor_lectura': motor_lectura(),
+        'resultados': [],
+    }
+    for empresa in empresas:
+        for filas in tamanos:
+            ruta = os.path.join(DATOS, f'{empresa}_{filas}_{filas_por_asiento}_{tasa_clave}.xlsx')
+            if not os.path.exists(ruta):
+                print(f'Generando {os.path.basename(ruta)}...', flush=True)
+                generar_estado(ruta, filas, empresa, filas_por_asiento, tasa_clave)
+            # Mejor de N corridas
+            corridas = [_medir_aislado(empresa, ruta) for _ in range(repeticiones)]
+            mejor = min(corridas, key=lambda c: c['total_s'])
+            mejor.update({'empresa': empresa, 'filas': filas})
+            reporte['resultados'].append(mejor)
+            etapas = ' '.join(f'{e}={mejor["etapas"][e]:.3f}' for e in ETAPAS)
+            print(f'{empresa:>12} {filas:>8} filas: {mejor["total_s"]:.3f} s, '
+                  f'{mejor["pico_rss_mb"]} MB | {etapas}', flush=True)
+    return reporte
+
+
+def comparar(anterior, actual):
+    """Imprime la razón actual/anterior del tiempo total y por etapa."""
+    previos = {(r['empresa'], r['filas']): r for r in anterior['resultados']}
+    print(f"Comparación {anterior['commit']} -> {actual['commit']} (razón < 1 = más rápido)")
+    for r in actual['resultados']:
+        p = previos.get((r['empresa'], r['filas']))
+        if not p:
+            continue
+        razones = ' '.join(
+            f'{e}={r["etapas"][e] / p["etapas"][e]:.2f}' for e in ETAPAS if p['etapas'].get(e)
+        )
+        print(f"{r['empresa']:>12} {r['filas']:>8} filas: total={r['total_s'] / p['total_s']:.2f} | {razones}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de transformar_excel con estados sintéticos.')
+    parser.add_argument('--empresas', nargs='+', default=['rm', 'tcomunicamos'])
+    parser.add_argument('--tamanos', nargs='+', type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--filas-por-asiento', type=int, default=4)
+    parser.add_argument('--tasa-clave', type=float, default=0.7)
+    parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto benchmarks/resultados/<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar')
+    args = parser.parse_args(argv)
+
+    reporte = ejecutar(args.empresas, args.tamanos, args.repeticiones,
+                       args.filas_por_asiento, args.tasa_clave)
+    salida = args.salida or os.path.join(RESULTADOS, f"{reporte['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    print(f'Resultados en {salida}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), reporte)
+
+
+if __name__ == '__main__':
+    main()
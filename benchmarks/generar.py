@@ -0,0 +1,84 @@
+# =============================
+# Generador de estados de cuenta sintéticos (formato export de Odoo)
+# =============================
+import os
+
+import numpy as np
+from openpyxl import Workbook
+
+# Mismo orden de columnas que "Línea de estado de cuenta bancario (account.bank.statement.line)"
+COLUMNAS = [
+    'Asiento contable', 'Fecha', 'Etiqueta', 'Importe', 'Partner', 'Referencia',
+    'Líneas de factura/Cuenta/Nombre de la cuenta', 'Líneas de factura',
+    'Líneas de factura/Débito', 'Líneas de factura/Crédito',
+]
+
+# Claves que aparecen en las líneas de factura reales de cada empresa
+CLAVES = {
+    'rm': ['FACTA', 'MAX', 'ALM', 'SUBMR', 'LINEA 9', 'CAJA DE COBRO', 'TRASPASO', 'SAT', 'COMISION'],
+    'tcomunicamos': ['F6PAR', 'SEXTA NORTE', 'PALACIO', 'FSEND', 'FGALE', 'EVENTO', 'FCAC1',
+                     'FCAC2', 'FCAC3', 'FCOMI', 'FMDIS', 'TRASPASO', 'TELMOV', 'LESPAGO'],
+}
+SIN_CLAVE = ['CLIENTES VARIOS', 'PAGO PROVEEDOR', 'VENTA MOSTRADOR', 'ANTICIPO']
+ETIQUETAS = ['DEPOSITO EN EFECTIVO/{n:07d}', 'SPEI RECIBIDOBANAMEX/{n:010d}',
+             'VENTAS TARJETAS BANCARIAS/{n:09d}', 'PAGO DE NOMINA/IN {n:010d}']
+PARTNERS = ['LUIS ENRIQUE GALEANA ALFARO', 'ENRIQUE JAVIER CHIO GONZALEZ', 'MARLENI GARCIA GARCIA',
+            'AQUILINO FERNANDEZ VENTURA', None, None]
+
+
+def generar_estado(ruta, filas, empresa='rm', filas_por_asiento=4, tasa_clave=0.7,
+                   tasa_negativos=0.1, semilla=0):
+    """Escribe un export sintético de ~filas renglones y devuelve la ruta.
+
+    Cada asiento tiene una fila de banco y filas de detalle (en promedio
+    filas_por_asiento en total); tasa_clave es la fracción de detalles que
+    contienen una palabra clave de la empresa y tasa_negativos la de asientos
+    con Importe negativo (pagos), que la transformación descarta.
+    """
+    rng = np.random.default_rng(semilla)
+    claves = CLAVES[empresa]
+    prefijo = 'BBVA1' if empresa == 'rm' else 'bbva'
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(COLUMNAS)
+
+    n_asientos = max(1, filas // filas_por_asiento)
+    detalles = rng.geometric(1 / max(filas_por_asiento - 1, 1), size=n_asientos)
+    importes = np.round(rng.uniform(100, 50000, size=n_asientos), 2)
+    negativos = rng.random(n_asientos) < tasa_negativos
+    dias = np.sort(rng.integers(1, 29, size=n_asientos))[::-1]
+
+    escritas = 0
+    for i in range(n_asientos):
+        if escritas >= filas:
+            break
+        numero = n_asientos - i
+        asiento = f'{prefijo}/2025/03/{numero:05d}'
+        etiqueta = ETIQUETAS[rng.integers(len(ETIQUETAS))].format(n=int(rng.integers(10**6)))
+        importe = float(-importes[i] if negativos[i] else importes[i])
+        fecha = np.datetime64(f'2025-03-{dias[i]:02d}').astype(object)
+
+        # Fila de banco
+        ws.append([asiento, fecha, etiqueta, importe, PARTNERS[rng.integers(len(PARTNERS))], None,
+                   'Banco', f'{asiento} {etiqueta}',
+                   max(importe, 0.0), max(-importe, 0.0)])
+
+        # Detalle: el importe repartido entre las líneas, con residuo de centavos
+        k = int(detalles[i])
+        partes = np.round(rng.dirichlet(np.ones(k)) * abs(importe), 2)
+        partes[-1] = round(partes[-1] + rng.choice([0.0, 0.01, -0.01, 0.25]), 2)
+        for j in range(k):
+            if rng.random() < tasa_clave:
+                clave = claves[rng.integers(len(claves))]
+            else:
+                clave = SIN_CLAVE[rng.integers(len(SIN_CLAVE))]
+            linea = f'{asiento} {clave}/{int(rng.integers(10000))} - {clave[:5]}/2025/{int(rng.integers(100000)):05d}'
+            monto = float(partes[j])
+            ws.append([None, None, None, None, None, None, 'Clientes nacionales', linea,
+                       monto if negativos[i] else 0.0, 0.0 if negativos[i] else monto])
+        escritas += 1 + k
+
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    wb.save(ruta)
+    return ruta
@@ -1,8 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import subprocess
+from tkinter import ttk, messagebox, filedialog
 import os
 
+from motor.arranque import precalentar
+from motor.servicio import transformador
+from motor.trabajador import Trabajador, describir_progreso, resumir_reporte
+
+# Pestañas del lanzador: (perfil en motor/perfiles.py, título de la pestaña, nombre)
+EMPRESAS = [
+    ('rm', "💼 RM", "RM"),
+    ('tcomunicamos', "🌐 Tcomunicamos", "Tcomunicamos"),
+]
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -11,9 +21,19 @@ class App(tk.Tk):
         self.configure(bg="#e8f0fe")
         self.iconbitmap(default='icono.ico') if os.path.exists("icono.ico") else None
 
+        # Las transformaciones corren en este mismo proceso: un solo hilo
+        # trabajador para ambas empresas y los módulos se importan una vez
+        self.trabajador = Trabajador()
+        self.pestanas = {}
+        self.en_curso = {}  # ruta de salida -> empresas encoladas, en orden
+
         self.crear_widgets()
         self.crear_statusbar()
 
+        # pandas/openpyxl se importan mientras el usuario elige el archivo
+        precalentar()
+        self.after(100, self.revisar_eventos)
+
     def crear_widgets(self):
         # Notebook con tabs
         notebook = ttk.Notebook(self)
@@ -24,25 +44,46 @@ class App(tk.Tk):
         style.configure("TButton", font=("Segoe UI", 12), padding=10)
         style.configure("TLabel", font=("Segoe UI", 14))
 
-        # Pestaña RM
-        frame_rm = ttk.Frame(notebook)
-        notebook.add(frame_rm, text="💼 RM")
+        for empresa, titulo, nombre in EMPRESAS:
+            self.crear_pestana(notebook, empresa, titulo, nombre)
+
+    def crear_pestana(self, notebook, empresa, titulo, nombre):
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=titulo)
 
-        label_rm = ttk.Label(frame_rm, text="Transformación para RM")
-        label_rm.pack(pady=40)
+        label = ttk.Label(frame, text=f"Transformación para {nombre}")
+        label.pack(pady=(30, 15))
 
-        btn_rm = ttk.Button(frame_rm, text="Ejecutar Transformación RM", command=self.ejecutar_rm)
-        btn_rm.pack()
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack()
+        btn_cargar = ttk.Button(btn_frame, text="📂 Cargar archivo", command=lambda: self.cargar_archivo(empresa))
+        btn_cargar.grid(row=0, column=0, padx=5)
+        btn_generar = ttk.Button(btn_frame, text=f"Ejecutar Transformación {nombre}",
+                                 command=lambda: self.ejecutar(empresa))
+        btn_generar.grid(row=0, column=1, padx=5)
 
-        # Pestaña Tcomunicamos
-        frame_tcom = ttk.Frame(notebook)
-        notebook.add(frame_tcom, text="🌐 Tcomunicamos")
+        label_archivo = ttk.Label(frame, text="Archivo cargado: Ninguno", font=("Segoe UI", 10))
+        label_archivo.pack(pady=(15, 5))
 
-        label_tcom = ttk.Label(frame_tcom, text="Transformación para Tcomunicamos")
-        label_tcom.pack(pady=40)
+        progreso_frame = ttk.Frame(frame)
+        progreso_frame.pack(fill='x', padx=30)
+        barra = ttk.Progressbar(progreso_frame, mode="determinate", maximum=100)
+        barra.pack(side='left', fill='x', expand=True)
+        btn_cancelar = ttk.Button(progreso_frame, text="✖ Cancelar", command=lambda: self.cancelar(empresa),
+                                  state=tk.DISABLED)
+        btn_cancelar.pack(side='left', padx=(8, 0))
 
-        btn_tcom = ttk.Button(frame_tcom, text="Ejecutar Transformación Tcomunicamos", command=self.ejecutar_tcomunicamos)
-        btn_tcom.pack()
+        label_progreso = ttk.Label(frame, text="", font=("Segoe UI", 9))
+        label_progreso.pack(pady=5)
+
+        self.pestanas[empresa] = {
+            'nombre': nombre,
+            'ruta_entrada': '',
+            'label_archivo': label_archivo,
+            'barra': barra,
+            'btn_cancelar': btn_cancelar,
+            'label_progreso': label_progreso,
+        }
 
     def crear_statusbar(self):
         self.status = tk.StringVar()
@@ -50,28 +91,78 @@ class App(tk.Tk):
         status_bar = tk.Label(self, textvariable=self.status, relief=tk.SUNKEN, anchor='w', bg="#dce6f2", font=("Segoe UI", 10))
         status_bar.pack(fill='x', side='bottom')
 
-    def ejecutar_rm(self):
-        ruta_script = os.path.join('rm', 'index.py')
-        self.ejecutar_script(ruta_script, "RM")
+    def cargar_archivo(self, empresa):
+        pestana = self.pestanas[empresa]
+        ruta = filedialog.askopenfilename(filetypes=[("Archivos Excel", "*.xlsx")])
+        pestana['ruta_entrada'] = ruta or ''
+        texto = f"✅ Archivo cargado: {os.path.basename(ruta)}" if ruta else "Archivo cargado: Ninguno"
+        pestana['label_archivo'].config(text=texto)
 
-    def ejecutar_tcomunicamos(self):
-        ruta_script = os.path.join('tcomunicamos', 'indext.py')
-        self.ejecutar_script(ruta_script, "Tcomunicamos")
+    def ejecutar(self, empresa):
+        pestana = self.pestanas[empresa]
+        if not pestana['ruta_entrada']:
+            messagebox.showwarning("⚠️", "Selecciona un archivo primero.")
+            return
+        ruta = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Archivos Excel", "*.xlsx")])
+        if not ruta:
+            return
+        try:
+            # En el servicio local si TRANSFORMADOR_SERVICIO está definido
+            transformar = transformador(empresa)
+        except Exception as e:
+            self.status.set("Error en la ejecución.")
+            messagebox.showerror("Error", f"No se pudo cargar {pestana['nombre']}.\n{e}")
+            return
+        self.en_curso.setdefault(os.path.abspath(ruta), []).append(empresa)
+        self.trabajador.encolar(pestana['ruta_entrada'], ruta, transformar, etiqueta=empresa)
+        pestana['btn_cancelar'].config(state=tk.NORMAL)
+        self.status.set(f"{pestana['nombre']}: en cola {os.path.basename(ruta)}")
 
-    def ejecutar_script(self, ruta, nombre):
-        if os.path.exists(ruta):
-            try:
-                self.status.set(f"Ejecutando {nombre}...")
-                self.update_idletasks()
-                subprocess.run(['python', ruta], check=True)
-                self.status.set(f"{nombre} ejecutado correctamente.")
-                messagebox.showinfo("Éxito", f"Transformación {nombre} completada.")
-            except subprocess.CalledProcessError as e:
-                self.status.set("Error en la ejecución.")
-                messagebox.showerror("Error", f"Ocurrió un error al ejecutar {nombre}.\n{e}")
+    def cancelar(self, empresa):
+        # Solo el trabajo de esta pestaña: el que está en curso o, si el que
+        # corre es de la otra empresa, los que esta pestaña dejó en cola
+        nombre = self.pestanas[empresa]['nombre']
+        if self.trabajador.cancelar(empresa):
+            self.status.set(f"Cancelando {nombre}...")
         else:
-            self.status.set("Archivo no encontrado.")
-            messagebox.showerror("Error", f"No se encontró el archivo {ruta}")
+            self.status.set(f"{nombre}: se quitan de la cola sus archivos pendientes")
+
+    def pendientes(self, empresa):
+        return any(empresa in empresas for empresas in self.en_curso.values())
+
+    def revisar_eventos(self):
+        # Eventos del hilo trabajador (Tk solo se toca desde el hilo principal)
+        while not self.trabajador.eventos.empty():
+            evento = self.trabajador.eventos.get_nowait()
+            tipo, salida = evento[0], os.path.abspath(evento[1][1])
+            pestana = self.pestanas[self.en_curso[salida][0]]
+            nombre = pestana['nombre']
+            if tipo == 'inicio':
+                pestana['barra']['value'] = 0
+                pestana['btn_cancelar'].config(state=tk.NORMAL)
+                self.status.set(f"Ejecutando {nombre}...")
+            elif tipo == 'progreso':
+                porcentaje, texto = describir_progreso(*evento[2:])
+                pestana['barra']['value'] = porcentaje
+                pestana['label_progreso'].config(text=texto)
+            else:
+                empresa = self.en_curso[salida].pop(0)
+                if not self.en_curso[salida]:
+                    del self.en_curso[salida]
+                if not self.pendientes(empresa):
+                    pestana['btn_cancelar'].config(state=tk.DISABLED)
+                pestana['barra']['value'] = 100 if tipo == 'ok' else 0
+                pestana['label_progreso'].config(text=resumir_reporte(evento[2]) if tipo == 'ok' else "")
+                if tipo == 'ok':
+                    self.status.set(f"{nombre} ejecutado correctamente.")
+                    messagebox.showinfo("Éxito", f"Transformación {nombre} completada.\n{salida}")
+                elif tipo == 'cancelado':
+                    self.status.set(f"{nombre} cancelado.")
+                else:
+                    self.status.set("Error en la ejecución.")
+                    messagebox.showerror("Error", f"Ocurrió un error al ejecutar {nombre}.\n{evento[2]}")
+        self.after(100, self.revisar_eventos)
+
 
 if __name__ == "__main__":
     app = App()
@@ -0,0 +1,3 @@
+# =============================
+# Motor de transformación compartido por RM y Tcomunicamos
+# =============================
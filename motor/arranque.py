@@ -0,0 +1,32 @@
+# =============================
+# Arranque rápido de las interfaces
+# =============================
+# Las ventanas solo necesitan Tk para aparecer; pandas y openpyxl se importan
+# en un hilo aparte mientras el usuario elige el archivo.
+import importlib
+import threading
+
+# Módulos que tardan en importarse (en orden de dependencia)
+MODULOS_PESADOS = [
+    'pandas',
+    'openpyxl',
+    'motor.lectura',
+    'motor.clasificacion',
+    'motor.exportar',
+]
+
+
+def importar_pesados(modulos=None):
+    """Importa los módulos pesados; los que fallen se reportan al usarse de verdad."""
+    for nombre in modulos or MODULOS_PESADOS:
+        try:
+            importlib.import_module(nombre)
+        except ImportError:
+            pass
+
+
+def precalentar(modulos=None):
+    """Lanza importar_pesados en un hilo daemon y devuelve el hilo."""
+    hilo = threading.Thread(target=importar_pesados, args=(modulos,), daemon=True)
+    hilo.start()
+    return hilo
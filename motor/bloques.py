@@ -0,0 +1,236 @@
+# =============================
+# Transformación por bloques para exports de muchos meses
+# =============================
+# La hoja se lee en bloques de FILAS_BLOQUE renglones. El último Asiento/Fecha
+# de cada bloque se arrastra al siguiente y las filas del asiento que queda
+# abierto al final del bloque esperan al siguiente; cada asiento completo se
+# agrupa en cuanto termina.
+#
+# Las filas agrupadas de cada bloque (ya ordenadas por asiento) se guardan en
+# archivos temporales y al final se mezclan en orden (merge de corridas
+# ordenadas) mientras se escriben al Excel. En memoria solo hay un bloque de
+# entrada o unos cuantos renglones por corrida, sin importar el tamaño del export.
+import heapq
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from motor.clasificacion import a_centavos, agrupar_asientos, clasificar_lineas, reporte_traslapes, MAX_TRASLAPES
+from motor.exportar import CADA_FILAS, HojaEstilizada, _valor_celda, anchos_columnas, anchos_dataframe
+from motor.lectura import FILAS_BLOQUE, leer_por_bloques, preparar_movimientos
+
+# Renglones agrupados por lectura/escritura de cada corrida temporal
+_RENGLONES_CORRIDA = 1000
+
+
+def _orden(clave):
+    # Mismo orden que factorize(sort=True): asientos ordenados y vacíos al final
+    return (1, '') if pd.isna(clave) else (0, clave)
+
+
+def _guardar_corrida(ruta, renglones):
+    with open(ruta, 'wb') as f:
+        for i in range(0, len(renglones), _RENGLONES_CORRIDA):
+            pickle.dump(renglones[i:i + _RENGLONES_CORRIDA], f, pickle.HIGHEST_PROTOCOL)
+
+
+def _leer_corrida(ruta):
+    with open(ruta, 'rb') as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+def _separar_pendiente(df, final):
+    """Divide el bloque en asientos completos y las filas del último asiento (abierto)."""
+    if final or not len(df):
+        return df, df.iloc[:0]
+    claves = df['Asiento contable']
+    ultima = claves.iat[-1]
+    mismo = claves.isna() if pd.isna(ultima) else (claves == ultima)
+    distintos = (~mismo.to_numpy()).nonzero()[0]
+    corte = distintos[-1] + 1 if len(distintos) else 0
+    return df.iloc[:corte], df.iloc[corte:]
+
+
+def _mezclar(corridas):
+    # Renglones (orden, fila) de todas las corridas, en orden de asiento
+    return heapq.merge(*(_leer_corrida(r) for r in corridas), key=lambda x: x[0])
+
+
+def _traslapadas(rangos):
+    """True si dos corridas comparten asientos posibles ((primero, último) de cada una)."""
+    rangos = sorted(rangos)
+    return any(siguiente[0] <= actual[1] for actual, siguiente in zip(rangos, rangos[1:]))
+
+
+def _sumar_montos(a, b):
+    # Montos en pesos sumados en centavos (como agrupar_asientos)
+    if a is None or b is None:
+        return b if a is None else a
+    return (round(a * 100) + round(b * 100)) / 100
+
+
+def _combinar(renglones, numericas):
+    # Un asiento repetido en dos bloques no contiguos llega dos veces seguidas
+    # tras la mezcla: se suman sus montos y se conservan los datos del primero
+    anterior = None
+    for orden, fila in renglones:
+        if anterior is not None and orden == anterior[0]:
+            anterior[1] = [_sumar_montos(a, b) if c in numericas else a
+                           for c, (a, b) in enumerate(zip(anterior[1], fila))]
+            continue
+        if anterior is not None:
+            yield anterior[1]
+        anterior = [orden, list(fila)]
+    if anterior is not None:
+        yield anterior[1]
+
+
+def transformar_por_bloques(perfil, ruta_entrada, ruta_salida, medicion, progreso=None,
+                            filas_bloque=FILAS_BLOQUE):
+    """Genera el Excel del perfil leyendo por bloques; anota etapas en medicion.
+
+    Devuelve el reporte de traslapes (líneas con varias categorías).
+    """
+    keywords_map = perfil['keywords_map']
+    columna_numero = perfil['totales'].get('columna_numero', '#')
+    previos = {'Asiento contable': None, 'Fecha': None}
+    pendiente = None
+    columnas = None
+    numericas = None   # índices de columnas numéricas en todos los bloques
+    totales = None
+    anchos = None
+    n_asientos = 0
+    rangos = []  # (primer, último) asiento de cada corrida
+    traslapes = {'total': 0, 'lineas': []}
+
+    with tempfile.TemporaryDirectory(prefix='conversor_bloques_') as tmp:
+        corridas = []
+        # Se lee un bloque adelantado para saber cuál es el último
+        bloques = leer_por_bloques(ruta_entrada, filas_bloque)
+        with medicion.etapa('lectura'):
+            siguiente = next(bloques, None)
+        while siguiente is not None:
+            nuevo, leidas, total_filas = siguiente
+            if progreso:
+                progreso('bloques', leidas, total_filas or leidas)
+            with medicion.etapa('lectura') as etapa:
+                siguiente = next(bloques, None)
+                etapa['filas'] = len(nuevo)
+            final = siguiente is None
+
+            with medicion.etapa('filtrado') as etapa:
+                nuevo = preparar_movimientos(nuevo, previos=previos, **perfil['movimientos'])
+                if len(nuevo):
+                    previos = {c: nuevo[c].iat[-1] for c in previos}
+                    previos = {c: None if pd.isna(v) else v for c, v in previos.items()}
+                df = pd.concat([pendiente, nuevo], ignore_index=True) if pendiente is not None else nuevo
+                df, pendiente = _separar_pendiente(df, final)
+                etapa['filas'] = len(df)
+            if not len(df):
+                continue
+
+            with medicion.etapa('clasificacion') as etapa:
+                mascaras, todas = clasificar_lineas(df, keywords_map, **perfil['clasificacion'])
+                parcial = reporte_traslapes(df, todas, mascaras, keywords_map,
+                                            MAX_TRASLAPES - len(traslapes['lineas']))
+                traslapes['total'] += parcial['total']
+                traslapes['lineas'] += parcial['lineas']
+                etapa['filas_clasificadas'] = int(mascaras.any(axis=1).sum())
+                etapa['filas_varias_categorias'] = parcial['total']
+
+            with medicion.etapa('agrupacion') as etapa:
+                agrupado = agrupar_asientos(df, keywords_map, mascaras=mascaras, **perfil['agrupacion'])
+                _, claves = pd.factorize(df['Asiento contable'], sort=True, use_na_sentinel=False)
+                etapa['asientos'] = len(agrupado)
+
+            with medicion.etapa('totales'):
+                # Columnas, anchos y sumas acumuladas para la fila TOTAL
+                if columnas is None:
+                    columnas = [columna_numero] + list(agrupado.columns)
+                    numericas = set(range(1, len(columnas)))
+                    totales = [0] * len(columnas)  # centavos
+                    anchos = [0] * len(columnas)
+                for c, col in enumerate(agrupado.columns, start=1):
+                    if pd.api.types.is_numeric_dtype(agrupado[col]):
+                        totales[c] += int(a_centavos(agrupado[col].to_numpy()).sum())
+                    else:
+                        numericas.discard(c)
+                filas = [[_valor_celda(v) for v in fila] for fila in agrupado.itertuples(index=False, name=None)]
+                anchos = [max(a, b) for a, b in zip(anchos, [0] + anchos_dataframe(agrupado))]
+                n_asientos += len(filas)
+
+                ruta = os.path.join(tmp, f'corrida_{len(corridas):05d}.pkl')
+                _guardar_corrida(ruta, [(_orden(k), f) for k, f in zip(claves, filas)])
+                corridas.append(ruta)
+                rangos.append((_orden(claves[0]), _orden(claves[-1])))
+
+        if columnas is None:
+            raise ValueError('El archivo no tiene movimientos para transformar.')
+        numericas_fila = {c - 1 for c in numericas}
+
+        # Un asiento repetido en bloques no contiguos está en varias corridas y
+        # sale como una sola fila: numeración y anchos se calculan sobre las
+        # filas ya combinadas (una pasada más por las corridas, solo si hace falta)
+        if _traslapadas(rangos):
+            with medicion.etapa('combinacion') as etapa:
+                n_asientos = 0
+                anchos = anchos_columnas([], columnas)
+                lote = []
+                for fila in _combinar(_mezclar(corridas), numericas_fila):
+                    lote.append([None] + fila)
+                    if len(lote) == _RENGLONES_CORRIDA:
+                        anchos = [max(a, b) for a, b in zip(anchos, anchos_columnas(lote, columnas))]
+                        n_asientos += len(lote)
+                        lote = []
+                anchos = [max(a, b) for a, b in zip(anchos, anchos_columnas(lote, columnas))]
+                n_asientos += len(lote)
+                etapa['asientos'] = n_asientos
+
+        # Fila TOTAL: numeración 1..n y sumas de las columnas numéricas
+        total = [''] * len(columnas)
+        total[0] = n_asientos * (n_asientos + 1) // 2
+        for c in numericas:
+            total[c] = totales[c] / 100
+        total[columnas.index('Concepto / Referencia')] = 'TOTAL'
+
+        # Anchos: los de cada bloque más la numeración y la fila TOTAL
+        anchos[0] = len(str(n_asientos)) + 2
+        anchos = [max(a, b) for a, b in zip(anchos, anchos_columnas([total], columnas))]
+
+        with medicion.etapa('exportacion') as etapa:
+            hoja = HojaEstilizada(columnas, anchos, keywords_map, **perfil['exportacion'])
+            try:
+                anterior = None
+                lote, separar = [], []
+                for i, fila in enumerate(_combinar(_mezclar(corridas), numericas_fila), start=1):
+                    fila = [i] + fila
+                    # Línea separadora: la fila anterior cierra el día si cambia el Día
+                    if anterior is not None:
+                        ultimo_dia = anterior[1]
+                        lote.append(anterior)
+                        separar.append(bool(ultimo_dia) and fila[1] != ultimo_dia)
+                    anterior = fila
+                    if len(lote) == CADA_FILAS:
+                        if progreso:
+                            progreso('exportacion', i, n_asientos)
+                        hoja.agregar_filas(lote, separar)
+                        lote, separar = [], []
+                if anterior is not None:
+                    lote.append(anterior)
+                    separar.append(False)
+                hoja.agregar_filas(lote, separar)
+            except BaseException:
+                hoja.descartar()
+                raise
+            if progreso:
+                progreso('exportacion', n_asientos, n_asientos)
+            etapa['celdas_estilizadas'] = hoja.cerrar(ruta_salida, total)
+            etapa['filas'] = n_asientos + 1
+
+    return traslapes
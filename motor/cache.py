@@ -0,0 +1,402 @@
+# =============================
+# Caché de resultados en disco
+# =============================
+# Si el mismo estado de cuenta se vuelve a transformar con el mismo perfil
+# y el mismo código, se copia el Excel generado la vez anterior sin leer ni
+# clasificar nada. Cada entrada es una carpeta <clave>/ con:
+#   salida.xlsx    archivo generado
+#   agrupado.pkl   DataFrame agrupado (con fila TOTAL; no existe si fue por bloques)
+#   meta.json      datos de la entrada; su fecha de modificación marca el último uso
+#
+# Además, en .lecturas/ se guarda una instantánea en columnas de cada archivo
+# leído (tipos ya convertidos y linea/partner en minúsculas), por contenido del
+# archivo y no por perfil: si solo cambian las palabras clave la corrida
+# siguiente no vuelve a leer el .xlsx. Con pyarrow instalado es Arrow IPC sin
+# comprimir (se abre con memory-map); si no, un pickle de pandas.
+#
+# En .incremental/ se guarda el estado del modo incremental (motor/incremental.py):
+# las filas agrupadas y la huella de cada asiento, una por salida y perfil.
+#
+# En .reglas/ van las reglas externas ya preparadas (motor/reglas.py).
+#
+# Entradas, instantáneas, estados y reglas comparten el límite de tamaño: al
+# guardar cualquiera de ellos se borra lo menos usado de todas las carpetas.
+#
+# Variables de entorno:
+#   TRANSFORMADOR_CACHE=<carpeta>   ubicación (por defecto en la carpeta de caché del usuario)
+#   TRANSFORMADOR_CACHE=no          desactiva la caché
+#   TRANSFORMADOR_CACHE_MB=<n>      tamaño máximo antes de borrar lo menos usado (500)
+#
+# Uso:
+#   python -m motor.cache --listar
+#   python -m motor.cache --invalidar "RM/para procesar/1bba marzo2025.xlsx"
+#   python -m motor.cache --limpiar
+import argparse
+import functools
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+VARIABLE_CACHE = 'TRANSFORMADOR_CACHE'
+VARIABLE_LIMITE = 'TRANSFORMADOR_CACHE_MB'
+LIMITE_MB = 500
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SALIDA = 'salida.xlsx'
+_AGRUPADO = 'agrupado.pkl'
+_META = 'meta.json'
+_LECTURAS = '.lecturas'
+_INCREMENTAL = '.incremental'
+_REGLAS = '.reglas'
+
+# Subcarpetas con archivos sueltos que también entran en el límite de tamaño
+_SUBCARPETAS = (_LECTURAS, _INCREMENTAL, _REGLAS)
+
+
+def directorio_cache():
+    """Carpeta de la caché, o None si está desactivada."""
+    valor = os.environ.get(VARIABLE_CACHE, '').strip()
+    if valor.lower() in ('no', '0', 'false'):
+        return None
+    if valor:
+        return valor
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'conversor_excel', 'resultados')
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido del archivo (leído por bloques)."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def version_codigo():
+    """Huella del código del motor: cualquier cambio invalida la caché."""
+    import pandas as pd
+
+    h = hashlib.sha256(pd.__version__.encode())
+    for ruta in sorted(glob.glob(os.path.join(RAIZ, 'motor', '*.py'))):
+        with open(ruta, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def clave_resultado(ruta_entrada, *reglas):
+    """Clave de la entrada: contenido del archivo + reglas (perfil, keywords_map...) + versión."""
+    entrada = hash_archivo(ruta_entrada)
+    h = hashlib.sha256(entrada.encode())
+    h.update(version_codigo().encode())
+    h.update(json.dumps(reglas, sort_keys=True, ensure_ascii=False, default=str).encode())
+    return h.hexdigest()[:32], entrada
+
+
+@functools.lru_cache(maxsize=None)
+def version_lectura():
+    """Huella de la lectura (pandas + motor/lectura.py) para las instantáneas."""
+    import pandas as pd
+
+    h = hashlib.sha256(pd.__version__.encode())
+    with open(os.path.join(RAIZ, 'motor', 'lectura.py'), 'rb') as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def _arrow_disponible():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _carpeta(clave):
+    directorio = directorio_cache()
+    return os.path.join(directorio, clave) if directorio else None
+
+
+def restaurar_salida(clave, ruta_salida):
+    """Copia el resultado guardado a ruta_salida; devuelve False si no está en caché."""
+    carpeta = _carpeta(clave)
+    if not carpeta or not os.path.exists(os.path.join(carpeta, _META)):
+        return False
+    try:
+        shutil.copyfile(os.path.join(carpeta, _SALIDA), ruta_salida)
+        os.utime(os.path.join(carpeta, _META))  # último uso (LRU)
+    except OSError:
+        return False
+    return True
+
+
+def cargar_agrupado(clave):
+    """DataFrame agrupado guardado para la clave, o None si no está en caché."""
+    import pandas as pd
+
+    carpeta = _carpeta(clave)
+    if not carpeta or not os.path.exists(os.path.join(carpeta, _AGRUPADO)):
+        return None
+    os.utime(os.path.join(carpeta, _META))
+    return pd.read_pickle(os.path.join(carpeta, _AGRUPADO))
+
+
+def _ruta_lectura(entrada_sha256, extension):
+    directorio = directorio_cache()
+    if not directorio:
+        return None
+    nombre = f'{entrada_sha256[:32]}-{version_lectura()[:8]}.{extension}'
+    return os.path.join(directorio, _LECTURAS, nombre)
+
+
+def cargar_lectura(entrada_sha256):
+    """Instantánea de la lectura del archivo, o None si no existe."""
+    import pandas as pd
+
+    for extension in ('arrow', 'pkl'):
+        ruta = _ruta_lectura(entrada_sha256, extension)
+        if not ruta or not os.path.exists(ruta):
+            continue
+        try:
+            if extension == 'arrow':
+                if not _arrow_disponible():
+                    continue
+                from pyarrow import feather
+                df = feather.read_table(ruta, memory_map=True).to_pandas()
+            else:
+                df = pd.read_pickle(ruta)
+            os.utime(ruta)  # último uso (LRU)
+        except Exception:
+            # Instantánea dañada o de otra versión de pyarrow: se vuelve a leer el .xlsx
+            return None
+        return df
+    return None
+
+
+def guardar_lectura(entrada_sha256, df):
+    """Guarda la instantánea de la lectura (Arrow IPC si hay pyarrow, si no pickle)."""
+    ruta = _ruta_lectura(entrada_sha256, 'pkl')
+    if not ruta:
+        return
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(ruta))
+    os.close(fd)
+    try:
+        if _arrow_disponible():
+            from pyarrow import feather
+            try:
+                feather.write_feather(df.reset_index(drop=True), temporal, compression='uncompressed')
+                ruta = _ruta_lectura(entrada_sha256, 'arrow')
+            except Exception:
+                # Columnas con tipos mezclados que Arrow no acepta: se usa pickle
+                df.to_pickle(temporal)
+        else:
+            df.to_pickle(temporal)
+        os.replace(temporal, ruta)
+    except OSError:
+        return
+    finally:
+        # Tras un error (de disco, de pickle o de Arrow) no queda el temporal
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    podar()
+
+
+def _ruta_estado(clave):
+    directorio = directorio_cache()
+    return os.path.join(directorio, _INCREMENTAL, f'{clave}.pkl') if directorio else None
+
+
+def cargar_estado(clave):
+    """Estado incremental guardado para la clave, o None si no existe."""
+    import pickle
+
+    ruta = _ruta_estado(clave)
+    if not ruta or not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, 'rb') as f:
+            estado = pickle.load(f)
+        os.utime(ruta)  # último uso (LRU)
+        return estado
+    except Exception:
+        # Estado dañado o de otra versión: se procesa todo de nuevo
+        return None
+
+
+def guardar_estado(clave, estado):
+    """Guarda el estado incremental (archivo temporal y renombrado)."""
+    import pickle
+
+    ruta = _ruta_estado(clave)
+    if not ruta:
+        return
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(ruta))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(estado, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+    except OSError:
+        return
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    podar()
+
+
+def _listar_archivos(subcarpeta=_LECTURAS):
+    # Archivos de una subcarpeta (instantáneas, estados...) con su último uso y tamaño
+    directorio = directorio_cache()
+    carpeta = os.path.join(directorio, subcarpeta) if directorio else None
+    if not carpeta or not os.path.isdir(carpeta):
+        return []
+    archivos = []
+    for e in os.scandir(carpeta):
+        if e.name.startswith('.'):
+            continue
+        try:
+            estado = e.stat()
+        except OSError:
+            continue
+        archivos.append({'ruta': e.path, 'usado': estado.st_mtime, 'bytes': estado.st_size})
+    return archivos
+
+
+def guardar_resultado(clave, ruta_salida, df_grouped, **meta):
+    """Guarda la salida y el DataFrame agrupado; después recorta la caché al límite."""
+    directorio = directorio_cache()
+    if not directorio:
+        return
+    carpeta = os.path.join(directorio, clave)
+    if os.path.exists(carpeta):
+        return
+    os.makedirs(directorio, exist_ok=True)
+    # Se escribe en una carpeta temporal y se renombra: otro proceso del lote
+    # nunca ve una entrada a medias
+    temporal = tempfile.mkdtemp(prefix='.tmp-', dir=directorio)
+    try:
+        shutil.copyfile(ruta_salida, os.path.join(temporal, _SALIDA))
+        if df_grouped is not None:  # por bloques no hay DataFrame completo
+            df_grouped.to_pickle(os.path.join(temporal, _AGRUPADO))
+        with open(os.path.join(temporal, _META), 'w', encoding='utf-8') as f:
+            json.dump({'clave': clave, 'creado': time.strftime('%Y-%m-%d %H:%M:%S'), **meta},
+                      f, indent=2, ensure_ascii=False)
+        os.rename(temporal, carpeta)
+    except OSError:
+        return
+    finally:
+        # Tras el renombrado ya no existe; si algo falló no queda a medias
+        shutil.rmtree(temporal, ignore_errors=True)
+    podar()
+
+
+def listar():
+    """Entradas de la caché, de la más reciente a la menos usada."""
+    directorio = directorio_cache()
+    if not directorio or not os.path.isdir(directorio):
+        return []
+    entradas = []
+    for nombre in os.listdir(directorio):
+        carpeta = os.path.join(directorio, nombre)
+        meta = os.path.join(carpeta, _META)
+        if nombre.startswith('.') or not os.path.exists(meta):
+            continue
+        try:
+            with open(meta, encoding='utf-8') as f:
+                datos = json.load(f)
+            datos['usado'] = os.path.getmtime(meta)
+            datos['bytes'] = sum(e.stat().st_size for e in os.scandir(carpeta))
+        except (OSError, ValueError):
+            continue
+        entradas.append(datos)
+    return sorted(entradas, key=lambda e: e['usado'], reverse=True)
+
+
+def podar(limite_mb=None):
+    """Borra las entradas, instantáneas, estados y reglas menos usados hasta quedar bajo el límite.
+
+    Devuelve cuántas borró.
+    """
+    if limite_mb is None:
+        limite_mb = float(os.environ.get(VARIABLE_LIMITE, LIMITE_MB))
+    restante = limite_mb * 1024 * 1024
+    borradas = 0
+    todas = listar()
+    for subcarpeta in _SUBCARPETAS:
+        todas += _listar_archivos(subcarpeta)
+    for datos in sorted(todas, key=lambda e: e['usado'], reverse=True):
+        restante -= datos['bytes']
+        if restante < 0:
+            if 'ruta' in datos:
+                _borrar(datos['ruta'])
+            else:
+                shutil.rmtree(_carpeta(datos['clave']), ignore_errors=True)
+            borradas += 1
+    return borradas
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def invalidar(clave=None, ruta_entrada=None):
+    """Borra una entrada, todas las de un archivo de entrada o (sin argumentos) toda la caché.
+
+    Con ruta_entrada (o sin argumentos) también se borran sus instantáneas de
+    lectura; sin argumentos, también el estado incremental y las reglas
+    preparadas.
+    """
+    entrada = hash_archivo(ruta_entrada) if ruta_entrada else None
+    borradas = 0
+    for datos in listar():
+        if (clave is None and entrada is None) or datos['clave'] == clave or datos.get('entrada_sha256') == entrada:
+            shutil.rmtree(_carpeta(datos['clave']), ignore_errors=True)
+            borradas += 1
+    for datos in _listar_archivos(_LECTURAS):
+        if clave is None and (entrada is None or os.path.basename(datos['ruta']).startswith(entrada[:32])):
+            _borrar(datos['ruta'])
+            borradas += 1
+    if clave is None and entrada is None and directorio_cache():
+        for subcarpeta in (_INCREMENTAL, _REGLAS):
+            shutil.rmtree(os.path.join(directorio_cache(), subcarpeta), ignore_errors=True)
+    return borradas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Administra la caché de resultados.')
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--listar', action='store_true')
+    grupo.add_argument('--invalidar', metavar='ENTRADA', help='Borra los resultados de este archivo de entrada')
+    grupo.add_argument('--limpiar', action='store_true', help='Borra toda la caché')
+    args = parser.parse_args(argv)
+
+    if not directorio_cache():
+        print('La caché está desactivada.')
+        return 0
+    if args.listar:
+        for datos in listar():
+            usado = time.strftime('%Y-%m-%d %H:%M', time.localtime(datos['usado']))
+            print(f"{datos['clave']}  {usado}  {datos['bytes'] / 1024:8.0f} KB  "
+                  f"{datos.get('transformador', '')}  {datos.get('entrada', '')}")
+        lecturas = _listar_archivos(_LECTURAS)
+        print(f"{len(lecturas)} instantáneas de lectura "
+              f"({sum(d['bytes'] for d in lecturas) / 1024:.0f} KB)")
+        estados = _listar_archivos(_INCREMENTAL)
+        print(f"{len(estados)} estados incrementales "
+              f"({sum(d['bytes'] for d in estados) / 1024:.0f} KB)")
+    else:
+        borradas = invalidar(ruta_entrada=args.invalidar)
+        print(f'{borradas} entradas borradas de {directorio_cache()}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+# =============================
+# Clasificación vectorizada de asientos contables
+# =============================
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Columnas que alimentan una categoría cuando el perfil no indica otra cosa
+COLUMNAS_CATEGORIA = ['Líneas de factura/Débito', 'Líneas de factura/Crédito']
+
+# Reglas compiladas por keywords_map (se compilan una vez por proceso). Con
+# reglas que se recargan (motor/reglas.py) cada versión es una llave nueva:
+# se guardan solo las MAX_COMPILADAS usadas más recientemente.
+_compiladas = OrderedDict()
+MAX_COMPILADAS = 16
+
+# Máximo de líneas con varias categorías que se listan en el reporte
+MAX_TRASLAPES = 200
+
+
+def _patron_trie(palabras):
+    """Expresión con las palabras factorizadas por prefijo común (trie).
+
+    En cada posición el motor de re solo sigue la rama de la letra actual,
+    así que el costo depende del largo del texto y no del número de palabras.
+    Las terminaciones opcionales son codiciosas: gana la palabra más larga.
+    """
+    trie = {}
+    for palabra in palabras:
+        nodo = trie
+        for letra in palabra:
+            nodo = nodo.setdefault(letra, {})
+        nodo[''] = {}
+
+    def construir(nodo):
+        ramas = [re.escape(letra) + construir(hijo) for letra, hijo in sorted(nodo.items()) if letra]
+        if not ramas:
+            return ''
+        cuerpo = ramas[0] if len(ramas) == 1 else '(?:' + '|'.join(ramas) + ')'
+        return f'(?:{cuerpo})?' if '' in nodo else cuerpo
+
+    return construir(trie)
+
+
+def _llave(keywords_map):
+    return tuple((col, tuple(keys)) for col, keys in keywords_map.items())
+
+
+def preparar_keywords(keywords_map):
+    """Texto de la expresión (sin compilar) y tabla palabra -> categorías de keywords_map.
+
+    Es la parte que se puede guardar en disco (ver motor/reglas.py): re no
+    permite guardar una expresión ya compilada.
+    """
+    palabras = sorted({kw for keys in keywords_map.values() for kw in keys})
+    # Lookahead para encontrar coincidencias traslapadas; en cada posición gana la
+    # palabra más larga, así que las demás que empiezan ahí son prefijos de ella.
+    fuente = '(?=(' + _patron_trie(palabras) + '))' if palabras else None
+
+    # Una palabra cuenta para cada categoría con una clave que sea prefijo de
+    # ella: se buscan sus prefijos en lugar de comparar contra todas las claves
+    por_clave = {}
+    for i, keys in enumerate(keywords_map.values()):
+        for k in keys:
+            por_clave.setdefault(k, set()).add(i)
+    filas = []
+    for kw in palabras:
+        categorias = set()
+        for largo in range(len(kw) + 1):
+            categorias.update(por_clave.get(kw[:largo], ()))
+        filas.extend((kw, i) for i in sorted(categorias))
+    return fuente, pd.DataFrame(filas, columns=['kw', 'categoria'])
+
+
+def compilar_keywords(keywords_map, preparadas=None):
+    """Compila keywords_map en una sola expresión y una tabla palabra -> categorías.
+
+    preparadas es el resultado de preparar_keywords si ya se tiene; así solo
+    falta compilar la expresión.
+    """
+    llave = _llave(keywords_map)
+    if llave in _compiladas:
+        _compiladas.move_to_end(llave)
+        return _compiladas[llave]
+
+    fuente, tabla = preparadas or preparar_keywords(keywords_map)
+    patron = re.compile(fuente) if fuente else None
+    _compiladas[llave] = patron, tabla
+    while len(_compiladas) > MAX_COMPILADAS:
+        _compiladas.popitem(last=False)
+    return patron, tabla
+
+
+def _hallazgos(serie, patron):
+    # (fila, palabra clave) de cada coincidencia. En una categoría se busca una
+    # sola vez por valor distinto; en texto se recorre sin armar una lista por fila
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        por_valor = pd.Series(serie.cat.categories.astype(str)).str.findall(patron).to_numpy()
+        cuantas = np.array([len(p) for p in por_valor] + [0])  # código -1: valor faltante
+        codigos = serie.cat.codes.to_numpy()
+        filas = np.repeat(np.arange(len(serie)), cuantas[codigos])
+        palabras = [p for c in codigos[cuantas[codigos] > 0] for p in por_valor[c]]
+        return filas, palabras
+    filas, palabras = [], []
+    buscar = patron.findall
+    for fila, texto in enumerate(serie.to_numpy(dtype=object)):
+        for palabra in buscar(texto):
+            filas.append(fila)
+            palabras.append(palabra)
+    return np.array(filas, dtype=np.int64), palabras
+
+
+def mascaras_categorias(df, keywords_map):
+    """Matriz booleana filas x categorías con una búsqueda sobre 'linea' y otra sobre 'partner'."""
+    mascaras = np.zeros((len(df), len(keywords_map)), dtype=bool)
+    patron, tabla = compilar_keywords(keywords_map)
+    if patron is None or not len(df):
+        return mascaras
+
+    filas, palabras = [], []
+    for col in ('linea', 'partner'):
+        encontradas, claves = _hallazgos(df[col], patron)
+        filas.append(encontradas)
+        palabras.extend(claves)
+    pares = pd.DataFrame({'fila': np.concatenate(filas), 'kw': np.array(palabras, dtype=object)})
+    pares = pares.merge(tabla, on='kw')
+    mascaras[pares['fila'].to_numpy(), pares['categoria'].to_numpy()] = True
+    return mascaras
+
+
+def aplicar_precedencia(mascaras, keywords_map, precedencia=None):
+    """Deja una sola categoría por fila: la primera según precedencia.
+
+    precedencia es una lista de categorías de mayor a menor prioridad; las
+    que no aparecen van después, en el orden de keywords_map.
+    """
+    categorias = list(keywords_map)
+    orden = [c for c in precedencia or [] if c in keywords_map]
+    orden += [c for c in categorias if c not in orden]
+    columnas = [categorias.index(c) for c in orden]
+
+    # Primera categoría encontrada en el orden de precedencia
+    primera = np.argmax(mascaras[:, columnas], axis=1)
+    unica = np.zeros_like(mascaras)
+    filas = np.flatnonzero(mascaras.any(axis=1))
+    unica[filas, np.asarray(columnas)[primera[filas]]] = True
+    return unica
+
+
+def clasificar_lineas(df, keywords_map, exclusiva=False, precedencia=None):
+    """Clasifica cada fila; devuelve (mascaras usadas, todas las coincidencias).
+
+    Con exclusiva=True cada fila suma solo en una categoría (aplicar_precedencia);
+    si no, suma en todas las que coincide, como antes.
+    """
+    todas = mascaras_categorias(df, keywords_map)
+    if not exclusiva:
+        return todas, todas
+    return aplicar_precedencia(todas, keywords_map, precedencia), todas
+
+
+def reporte_traslapes(df, todas, mascaras, keywords_map, limite=MAX_TRASLAPES):
+    """Líneas que coinciden con varias categorías (hasta limite) y la que se usó."""
+    categorias = np.array(list(keywords_map), dtype=object)
+    filas = np.flatnonzero(todas.sum(axis=1) > 1)
+    lineas = []
+    for f in filas[:limite]:
+        lineas.append({
+            'asiento': df['Asiento contable'].iat[f],
+            'linea': df['Líneas de factura'].iat[f],
+            'categorias': list(categorias[todas[f]]),
+            'asignada': list(categorias[mascaras[f]]),
+        })
+    return {'total': len(filas), 'lineas': lineas}
+
+
+def a_centavos(valores):
+    """Montos en pesos (float, NaN = 0) a centavos enteros int64."""
+    return np.round(np.nan_to_num(np.asarray(valores, dtype=float)) * 100).astype(np.int64)
+
+
+def a_pesos(centavos):
+    """Centavos enteros al monto en pesos más cercano (float)."""
+    return np.asarray(centavos, dtype=np.int64) / 100
+
+
+def agrupar_asientos(df, keywords_map, columnas_categoria=None, mascaras=None, columnas_defecto=None,
+                     columna_asiento=False, cargo=None, abono='Importe', base_residuo='Abono',
+                     columna_otros=None, decimales_redond=None):
+    """Resumen por asiento contable: Día, Concepto, Abono, categorías, Redond y Saldo.
+
+    columnas_categoria indica qué columnas se suman para cada categoría;
+    las categorías que no aparecen usan columnas_defecto (COLUMNAS_CATEGORIA
+    si no se indica). mascaras puede venir ya calculada con mascaras_categorias.
+    cargo y abono son las columnas que se suman para esos montos (cargo=None
+    lo deja vacío); el residuo no clasificado se calcula sobre base_residuo y
+    va a columna_otros si se indica, si no a Redond.
+
+    Los montos se suman en centavos enteros: Redond y Saldo son exactos (un
+    asiento cuadrado da 0, no -9e-13) y solo al final se pasan a pesos.
+    """
+    columnas_categoria = columnas_categoria or {}
+    columnas_defecto = columnas_defecto or COLUMNAS_CATEGORIA
+    if mascaras is None:
+        mascaras = mascaras_categorias(df, keywords_map)
+
+    # Cada columna fuente se pasa a centavos una sola vez
+    fuentes = {}
+
+    def centavos(col):
+        if col not in fuentes:
+            fuentes[col] = a_centavos(df[col].to_numpy(dtype=float))
+        return fuentes[col]
+
+    # Columnas por línea, en centavos: cargo, abono y el monto de cada
+    # categoría (cero en las líneas que no son de esa categoría)
+    lineas = {'fila': np.arange(len(df))}
+    agregaciones = {'primera': ('fila', 'min')}
+    if cargo:
+        lineas['cargo'] = centavos(cargo)
+        agregaciones['cargo'] = ('cargo', 'sum')
+    lineas['Abono'] = centavos(abono)
+    agregaciones['Abono'] = ('Abono', 'sum')
+    for i, col in enumerate(keywords_map):
+        monto = sum(centavos(fuente) for fuente in columnas_categoria.get(col, columnas_defecto))
+        lineas[f'categoria_{i}'] = np.where(mascaras[:, i], monto, 0)
+        agregaciones[f'categoria_{i}'] = (f'categoria_{i}', 'sum')
+
+    # Una fila por asiento (orden de groupby: ordenado y vacíos al final);
+    # Día, Concepto y Referencia salen de la primera línea de cada asiento
+    codigos, _ = pd.factorize(df['Asiento contable'], sort=True, use_na_sentinel=False)
+    grupos = pd.DataFrame(lineas).groupby(codigos, sort=True).agg(**agregaciones)
+    primeras = df.iloc[grupos['primera'].to_numpy()]
+
+    montos = {}
+    if cargo:
+        montos['cargo'] = grupos['cargo'].to_numpy()
+    montos['Abono'] = grupos['Abono'].to_numpy()
+    suma_clas = np.zeros(len(grupos), dtype=np.int64)
+    for i, col in enumerate(keywords_map):
+        montos[col] = grupos[f'categoria_{i}'].to_numpy()
+        suma_clas += montos[col]
+
+    # Residuo: diferencia entre el monto base y la suma clasificada
+    residuo = montos[base_residuo] - suma_clas
+    if columna_otros:
+        montos[columna_otros] = residuo
+        residuo = residuo - montos[columna_otros]
+    if decimales_redond is not None and decimales_redond < 2:
+        paso = 10 ** (2 - decimales_redond)
+        montos['Redond'] = (np.round(residuo / paso) * paso).astype(np.int64)
+    else:
+        montos['Redond'] = residuo
+    montos['Saldo'] = residuo - montos['Redond']
+
+    res = pd.DataFrame({'Día': pd.to_datetime(primeras['Fecha']).dt.date.to_numpy()})
+    if columna_asiento:
+        res['Asiento contable'] = primeras['Asiento contable'].to_numpy()
+    res['Concepto / Referencia'] = primeras['Líneas de factura'].to_numpy()
+    res['cargo'] = a_pesos(montos['cargo']) if cargo else ''
+    res['Abono'] = a_pesos(montos['Abono'])
+    res['Referencia'] = primeras['Referencia'].to_numpy()
+    for col in keywords_map:
+        res[col] = a_pesos(montos[col])
+    if columna_otros:
+        res[columna_otros] = a_pesos(montos[columna_otros])
+    res['Redond'] = a_pesos(montos['Redond'])
+    res['Saldo'] = a_pesos(montos['Saldo'])
+    return res
+
+
+def sumar_columna(serie):
+    """Total de una columna numérica: los montos (float) se suman en centavos."""
+    if pd.api.types.is_float_dtype(serie):
+        return a_centavos(serie.to_numpy()).sum() / 100
+    return serie.sum()
+
+
+def agregar_totales(df_grouped, columna_numero='#'):
+    """Numera los asientos (columna_numero) y agrega la fila TOTAL al final."""
+    df_grouped.insert(0, columna_numero, range(1, len(df_grouped) + 1))
+    total = {c: sumar_columna(df_grouped[c]) if pd.api.types.is_numeric_dtype(df_grouped[c]) else ''
+        for c in df_grouped.columns}
+    total['Concepto / Referencia'] = 'TOTAL'
+    return pd.concat([df_grouped, pd.DataFrame([total])], ignore_index=True)
@@ -0,0 +1,182 @@
+# =============================
+# Libro consolidado de varios bancos
+# =============================
+# Uso:
+#   python -m motor.consolidado rm "RM/resultados/rm marzo25.xlsx" "RM/para procesar/1bba marzo2025.xlsx" "RM/para procesar/santander marzo2025.xlsx"
+#   python -m motor.consolidado rm "RM/resultados/rm marzo25.xlsx" --carpeta "RM/para procesar"
+#
+# Cada estado de cuenta se lee, clasifica y agrupa en paralelo (un proceso por
+# núcleo, como máximo uno por archivo) y todo se escribe en un solo libro: la
+# hoja Resumen con la fila TOTAL de cada banco y un gráfico combinado, y una
+# hoja por banco con el formato del perfil. El libro se guarda una sola vez.
+# Un banco con error se omite y se reporta; los demás sí se consolidan.
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from motor.medicion import Medicion
+from motor.perfiles import PERFILES, obtener_perfil
+
+# Caracteres que Excel no acepta en el nombre de una hoja
+_INVALIDOS = re.compile(r'[\[\]:*?/\\]')
+
+HOJA_RESUMEN = 'Resumen'
+
+
+def nombre_hoja(ruta, usados):
+    """Nombre de hoja a partir del archivo (máximo 31 caracteres, sin repetir)."""
+    base = _INVALIDOS.sub(' ', os.path.splitext(os.path.basename(ruta))[0]).strip()[:31] or 'Banco'
+    nombre, n = base, 2
+    while nombre.lower() in usados or nombre.lower() == HOJA_RESUMEN.lower():
+        sufijo = f' ({n})'
+        nombre = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(nombre.lower())
+    return nombre
+
+
+def agrupar_banco(perfil, ruta_entrada, ruta_salida, usar_cache=True):
+    """Agrupa un estado de cuenta (corre en el proceso trabajador).
+
+    Devuelve (df_grouped con fila TOTAL, reporte por etapa). Si el archivo ya
+    se transformó con el mismo perfil se toma el agrupado de la caché.
+    """
+    from motor.cache import cargar_agrupado, clave_resultado, directorio_cache
+    from motor.transformador import agrupar_estado
+
+    perfil = obtener_perfil(perfil)
+    medicion = Medicion(perfil['nombre'], ruta_entrada, ruta_salida)
+    entrada_sha256 = None
+    if usar_cache and directorio_cache():
+        with medicion.etapa('cache') as etapa:
+            clave, entrada_sha256 = clave_resultado(ruta_entrada, perfil, False)
+            df_grouped = cargar_agrupado(clave)
+            etapa['acierto'] = df_grouped is not None
+        if df_grouped is not None:
+            return df_grouped, medicion.finalizar()
+    df_grouped = agrupar_estado(perfil, ruta_entrada, medicion, entrada_sha256)
+    return df_grouped, medicion.finalizar()
+
+
+def consolidar(perfil, rutas_entrada, ruta_salida, procesos=None, usar_cache=True, progreso=None,
+               guardar_reporte=False):
+    """Escribe un solo libro con la hoja Resumen y una hoja por estado de cuenta.
+
+    Los archivos se agrupan en paralelo (procesos=1 los hace en este
+    proceso). Devuelve el reporte con las etapas de la consolidación, el
+    reporte de cada banco en 'bancos' y los que no se pudieron leer en
+    'errores' ({'archivo', 'error'}); esos no llevan hoja. Si ninguno se
+    pudo leer lanza ValueError y no se escribe el libro.
+    """
+    import pandas as pd
+    from openpyxl import Workbook
+
+    from motor.exportar import HojaEstilizada, anchos_dataframe, escribir_filas, hoja_resumen
+
+    perfil = obtener_perfil(perfil)
+    rutas_entrada = list(rutas_entrada)
+    if not rutas_entrada:
+        raise ValueError('No hay estados de cuenta para consolidar.')
+    keywords_map = perfil['keywords_map']
+    medicion = Medicion(perfil['nombre'], rutas_entrada[0], ruta_salida, progreso)
+    medicion.reporte['entrada'] = [os.path.abspath(r) for r in rutas_entrada]
+
+    # Lectura, clasificación y agrupación de cada banco en paralelo
+    with medicion.etapa('bancos') as etapa:
+        n = len(rutas_entrada)
+        resultados, errores = {}, {}
+        if procesos == 1 or n == 1:
+            for ruta in rutas_entrada:
+                try:
+                    resultados[ruta] = agrupar_banco(perfil, ruta, ruta_salida, usar_cache)
+                except Exception as e:
+                    errores[ruta] = f'{type(e).__name__}: {e}'
+        else:
+            with ProcessPoolExecutor(max_workers=min(procesos or os.cpu_count() or 1, n)) as pool:
+                futuros = {pool.submit(agrupar_banco, perfil, ruta, ruta_salida, usar_cache): ruta
+                           for ruta in rutas_entrada}
+                for futuro in as_completed(futuros):
+                    ruta = futuros[futuro]
+                    try:
+                        resultados[ruta] = futuro.result()
+                    except Exception as e:
+                        # Archivo que no es un export de Odoo, o el proceso trabajador murió
+                        errores[ruta] = f'{type(e).__name__}: {e}'
+        etapa['archivos'] = n
+        etapa['errores'] = len(errores)
+    medicion.reporte['errores'] = [{'archivo': os.path.basename(r), 'error': errores[r]}
+                                   for r in rutas_entrada if r in errores]
+    rutas_entrada = [r for r in rutas_entrada if r in resultados]
+    if not rutas_entrada:
+        raise ValueError('Ningún estado de cuenta se pudo consolidar: ' +
+                         '; '.join(f"{e['archivo']}: {e['error']}" for e in medicion.reporte['errores']))
+    resultados = [resultados[r] for r in rutas_entrada]
+    medicion.reporte['bancos'] = [reporte for _, reporte in resultados]
+
+    # Un solo libro write-only: una hoja por banco y al final el resumen
+    with medicion.etapa('exportacion') as etapa:
+        opciones = dict(perfil['exportacion'], grafico=False)  # el gráfico combinado va en Resumen
+        otros = perfil['agrupacion'].get('columna_otros')
+        libro = Workbook(write_only=True)
+        usados, totales, columnas = set(), [], []
+        etapa['celdas_estilizadas'] = 0
+        for ruta, (df_grouped, _) in zip(rutas_entrada, resultados):
+            banco = nombre_hoja(ruta, usados)
+            hoja = HojaEstilizada(df_grouped.columns, anchos_dataframe(df_grouped), keywords_map,
+                                  libro=libro, titulo=banco, **opciones)
+            total = escribir_filas(hoja, df_grouped, progreso)
+            etapa['celdas_estilizadas'] += hoja.terminar(total)
+            totales.append((banco, dict(zip(hoja.columnas, total))))
+            for c in df_grouped.columns:
+                if (c in keywords_map or c in ('cargo', 'Abono', otros, 'Redond')) and c not in columnas \
+                        and pd.api.types.is_numeric_dtype(df_grouped[c]):
+                    columnas.append(c)
+        resumen = hoja_resumen(libro, totales, columnas, keywords_map, HOJA_RESUMEN)
+        libro.move_sheet(resumen.title, offset=-len(rutas_entrada))
+        libro.save(ruta_salida)
+        etapa['hojas'] = len(rutas_entrada) + 1
+
+    return medicion.finalizar(guardar_reporte)
+
+
+def main(argv=None):
+    from motor.lote import listar_entradas
+
+    parser = argparse.ArgumentParser(description='Consolida varios estados de cuenta en un solo libro.')
+    parser.add_argument('empresa', choices=sorted(PERFILES))
+    parser.add_argument('salida', help='Libro consolidado a generar (.xlsx)')
+    parser.add_argument('entradas', nargs='*', help='Estados de cuenta exportados de Odoo')
+    parser.add_argument('--carpeta', help='Toma todos los .xlsx de esta carpeta')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='Procesos en paralelo (por defecto, uno por núcleo y como máximo uno por archivo)')
+    parser.add_argument('--sin-cache', action='store_true', help='No usa ni guarda resultados en la caché')
+    parser.add_argument('--reporte', action='store_true', help='Guarda el reporte JSON junto al libro')
+    args = parser.parse_args(argv)
+
+    entradas = list(args.entradas) + (listar_entradas(args.carpeta) if args.carpeta else [])
+    salida = os.path.abspath(args.salida)
+    entradas = [e for e in entradas if os.path.abspath(e) != salida]
+    if not entradas:
+        parser.error('indique los archivos de entrada o --carpeta')
+
+    inicio = time.perf_counter()
+    try:
+        reporte = consolidar(args.empresa, entradas, args.salida, args.procesos, not args.sin_cache,
+                             guardar_reporte=args.reporte)
+    except ValueError as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 1
+    for banco in reporte['bancos']:
+        print(f"✅ {os.path.basename(banco['entrada'])} ({banco['total_s']:.2f} s)")
+    for error in reporte['errores']:
+        print(f"❌ {error['archivo']} {error['error']}")
+    print(f"{len(reporte['bancos'])} bancos en {args.salida}, {len(reporte['errores'])} con error, "
+          f'{time.perf_counter() - inicio:.2f} s en total.')
+    return 1 if reporte['errores'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
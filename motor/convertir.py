@@ -0,0 +1,134 @@
+# =============================
+# Conversión desde la línea de comandos (sin ventanas)
+# =============================
+# Uso:
+#   python -m motor.convertir rm "RM/para procesar/1bba marzo2025.xlsx" -o "RM/resultados/1bba.xlsx"
+#   python -m motor.convertir tcomunicamos entrada.xlsx -f csv -o -           (tabla a la salida estándar)
+#   cat entrada.xlsx | python -m motor.convertir rm - -f ndjson -o asientos.ndjson
+#   python -m motor.convertir rm a.xlsx b.xlsx -f parquet -o carpeta/        (un archivo por entrada)
+#
+# Con -f xlsx se genera el mismo Excel estilizado que en las ventanas. Con
+# csv, parquet o ndjson se escribe solo la tabla agrupada (una fila por
+# asiento, sin la fila TOTAL) y no se aplica ningún estilo, que es la mayor
+# parte del tiempo de una transformación. Los mensajes van a stderr para que
+# stdout lleve solo los datos; el código de salida es 1 si algún archivo falló.
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from motor.medicion import Medicion
+from motor.perfiles import PERFILES, obtener_perfil
+
+FORMATOS = ('xlsx', 'csv', 'parquet', 'ndjson')
+
+ESTANDAR = '-'
+
+
+def escribir_tabla(df, ruta_salida, formato):
+    """Escribe la tabla agrupada en formato csv, parquet o ndjson."""
+    if formato == 'csv':
+        df.to_csv(ruta_salida, index=False, encoding='utf-8')
+    elif formato == 'ndjson':
+        df.to_json(ruta_salida, orient='records', lines=True, force_ascii=False, date_format='iso')
+    elif formato == 'parquet':
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ValueError('Para escribir Parquet instale pyarrow (pip install pyarrow)')
+        df.to_parquet(ruta_salida, index=False)
+    else:
+        raise ValueError(f'Formato desconocido: {formato!r} (disponibles: {", ".join(FORMATOS)})')
+
+
+def convertir(perfil, ruta_entrada, ruta_salida, formato='xlsx', usar_cache=True, guardar_reporte=False):
+    """Transforma un estado de cuenta al formato indicado y devuelve el reporte por etapa.
+
+    xlsx usa transformar_excel; los demás formatos toman el agrupado de la
+    caché si el archivo ya se transformó con el mismo perfil.
+    """
+    from motor.cache import cargar_agrupado, clave_resultado, directorio_cache
+    from motor.transformador import agrupar_estado, transformar_excel
+
+    perfil = obtener_perfil(perfil)
+    if formato == 'xlsx':
+        return transformar_excel(perfil, ruta_entrada, ruta_salida, guardar_reporte, usar_cache=usar_cache)
+
+    medicion = Medicion(perfil['nombre'], ruta_entrada, ruta_salida)
+    medicion.reporte['formato'] = formato
+    df_grouped = entrada_sha256 = None
+    if usar_cache and directorio_cache():
+        with medicion.etapa('cache') as etapa:
+            clave, entrada_sha256 = clave_resultado(ruta_entrada, perfil, False)
+            df_grouped = cargar_agrupado(clave)
+            etapa['acierto'] = df_grouped is not None
+    if df_grouped is None:
+        df_grouped = agrupar_estado(perfil, ruta_entrada, medicion, entrada_sha256)
+
+    with medicion.etapa('escritura') as etapa:
+        df = df_grouped.iloc[:-1]  # sin la fila TOTAL
+        escribir_tabla(df, ruta_salida, formato)
+        etapa['filas'] = len(df)
+    return medicion.finalizar(guardar_reporte)
+
+
+def _copiar_a_estandar(ruta):
+    with open(ruta, 'rb') as f:
+        shutil.copyfileobj(f, sys.stdout.buffer)
+    sys.stdout.buffer.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transforma estados de cuenta sin interfaz gráfica.')
+    parser.add_argument('empresa', choices=sorted(PERFILES))
+    parser.add_argument('entradas', nargs='*',
+                        help="Estados de cuenta exportados de Odoo ('-' o nada: se lee de stdin)")
+    parser.add_argument('-o', '--salida', required=True,
+                        help="Archivo a generar, carpeta si hay varias entradas, o '-' para stdout")
+    parser.add_argument('-f', '--formato', choices=FORMATOS, default='xlsx')
+    parser.add_argument('--sin-cache', action='store_true', help='No usa ni guarda resultados en la caché')
+    parser.add_argument('--reporte', action='store_true', help='Guarda el reporte JSON junto a cada salida')
+    args = parser.parse_args(argv)
+
+    entradas = args.entradas or [ESTANDAR]
+    if entradas.count(ESTANDAR) > 1:
+        parser.error("stdin ('-') solo puede usarse una vez")
+    if len(entradas) > 1 and args.salida == ESTANDAR:
+        parser.error("con varias entradas --salida debe ser una carpeta, no '-'")
+    if entradas == [ESTANDAR] and sys.stdin.isatty():
+        parser.error('indique los archivos de entrada o envíe el .xlsx por stdin')
+
+    errores = 0
+    with tempfile.TemporaryDirectory(prefix='conversor_cli_') as tmp:
+        for entrada in entradas:
+            nombre = 'stdin.xlsx' if entrada == ESTANDAR else os.path.basename(entrada)
+            if entrada == ESTANDAR:
+                entrada = os.path.join(tmp, nombre)
+                with open(entrada, 'wb') as f:
+                    shutil.copyfileobj(sys.stdin.buffer, f)
+            if args.salida == ESTANDAR:
+                salida = os.path.join(tmp, 'salida.' + args.formato)
+            elif len(entradas) > 1 or os.path.isdir(args.salida):
+                os.makedirs(args.salida, exist_ok=True)
+                salida = os.path.join(args.salida, os.path.splitext(nombre)[0] + '.' + args.formato)
+            else:
+                salida = args.salida
+
+            inicio = time.perf_counter()
+            try:
+                convertir(args.empresa, entrada, salida, args.formato, not args.sin_cache,
+                          args.reporte and args.salida != ESTANDAR)
+            except Exception as e:
+                errores += 1
+                print(f'❌ {nombre}: {type(e).__name__}: {e}', file=sys.stderr)
+                continue
+            if args.salida == ESTANDAR:
+                _copiar_a_estandar(salida)
+            print(f'✅ {nombre} -> {"stdout" if args.salida == ESTANDAR else salida} '
+                  f'({time.perf_counter() - inicio:.2f} s)', file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
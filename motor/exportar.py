@@ -0,0 +1,478 @@
+# =============================
+# Exportación con estilos en una sola escritura
+# =============================
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Border, Side, Font, Alignment
+from openpyxl.utils import get_column_letter
+
+# Colores por categoría
+PALETA = ['D9EAD3','FCE5CD','D0E0E3','EAD1DC','FFF2CC','C9DAF8','E2EFDA','E6B8B7',
+          'FFD966','B6D7A8','EA9999','A4C2F4','D5A6BD','B7DEE8']
+
+FORMATO_MONTO = '#,##0.00'
+FORMATO_FECHA = 'YYYY-MM-DD'
+
+# Cada cuántas filas se avisa el progreso de la escritura
+CADA_FILAS = 200
+
+# Ancho máximo de columna (un Concepto / Referencia largo no ensancha la hoja);
+# cada perfil puede cambiarlo con exportacion['ancho_maximo'] (None = sin tope)
+ANCHO_MAXIMO = 60
+
+
+def _relleno(color):
+    return PatternFill('solid', start_color=color, end_color=color)
+
+
+# Estilos compartidos (se crean una sola vez)
+header_fill = _relleno('4472C4')
+header_font = Font(color='FFFFFF', bold=True)
+header_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                       top=Side(style='thin'), bottom=Side(style='thin'))
+deposito_fill = _relleno('FFCCCC')  # Rosado
+traspaso_fill = _relleno('CCFFCC')  # Verde
+abono_fill = _relleno('CCE5FF')     # Azul
+alt_fill = _relleno('F2F2F2')
+total_fill = _relleno('F4CCCC')
+total_font = Font(bold=True)
+total_alignment = Alignment(horizontal='center')
+separador_border = Border(bottom=Side(style='thin', color='000000'))
+redond_fonts = {-1: Font(color='FF0000'), 1: Font(color='000000'), 0: Font(color='FFFFFF')}
+
+# Variantes de formato por perfil
+ESTILOS = {
+    # Cabecera azul, color por categoría, conceptos/abono/filas alternas
+    # resaltados, montos con separador de miles y Redond por signo
+    'completo': {
+        'cabecera_fill': header_fill,
+        'cabecera_font': header_font,
+        'cabecera_vertical': None,
+        'relleno_categoria': None,  # None = PALETA
+        'resaltar_filas': True,
+        'formato_montos': True,
+        'colores_redond': True,
+    },
+    # Como lo deja to_excel, con las categorías clasificadas en verde
+    'sencillo': {
+        'cabecera_fill': None,
+        'cabecera_font': Font(bold=True),
+        'cabecera_vertical': 'top',
+        'relleno_categoria': 'D9EAD3',
+        'resaltar_filas': False,
+        'formato_montos': False,
+        'colores_redond': False,
+    },
+}
+
+
+def _valor_celda(v):
+    # NaN/NaT se exportan como celda vacía (igual que to_excel)
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    return v
+
+
+def _es_numero(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+# Posiciones fijas en HojaEstilizada.rellenos (después van los de categoría)
+_ALTERNA, _ABONO, _DEPOSITO, _TRASPASO = 1, 2, 3, 4
+
+_es_numero_vec = np.frompyfunc(_es_numero, 1, 1)
+_es_fecha_vec = np.frompyfunc(lambda v: isinstance(v, datetime.date), 1, 1)
+_con_valor_vec = np.frompyfunc(lambda v: v not in (None, 0, ''), 1, 1)
+
+
+def _mascara_numero(col):
+    return _es_numero_vec(col).astype(bool)
+
+
+def _mascara_fecha(col):
+    return _es_fecha_vec(col).astype(bool)
+
+
+def _mascara_con_valor(col):
+    return _con_valor_vec(col).astype(bool)
+
+
+def _texto_guardado(v):
+    """Texto del valor tal como queda en el archivo guardado (para los anchos)."""
+    if isinstance(v, datetime.datetime):
+        return str(v)
+    if isinstance(v, datetime.date):
+        return str(datetime.datetime(v.year, v.month, v.day))
+    if _es_numero(v):
+        s = '%.16g' % v
+        return str(float(s) if ('.' in s or 'e' in s or 'E' in s) else int(s))
+    return str(v)
+
+
+def anchos_columnas(filas, columnas):
+    # Ancho = texto más largo de la columna + 2 (incluye cabecera y TOTAL)
+    anchos = [len(str(c)) if c else 0 for c in columnas]
+    for fila in filas:
+        for i, v in enumerate(fila):
+            if v:
+                anchos[i] = max(anchos[i], len(_texto_guardado(v)))
+    return [a + 2 for a in anchos]
+
+
+def _largo_maximo(serie):
+    """Largo del texto guardado más largo de la columna (vacíos y ceros no cuentan)."""
+    valores = serie.to_numpy()
+    if valores.dtype.kind == 'f':
+        valores = valores[~np.isnan(valores) & (valores != 0)]
+        if not len(valores):
+            return 0
+        # repr más corto de numpy; los enteros se guardan sin ".0"
+        texto = valores.astype(str)
+        largos = np.char.str_len(texto) - 2 * np.char.endswith(texto, '.0')
+        # Con 17 cifras el valor guardado (16 cifras) puede ser más corto:
+        # esos pocos se calculan como _texto_guardado
+        largos_17 = largos >= 17
+        if largos_17.any():
+            largos[largos_17] = [len(_texto_guardado(v)) for v in valores[largos_17].tolist()]
+        return int(largos.max())
+    if valores.dtype.kind in 'iu':
+        valores = valores[valores != 0]
+        return int(np.char.str_len(valores.astype(str)).max()) if len(valores) else 0
+    serie = serie[serie.notna() & (serie != '')]
+    if not len(serie):
+        return 0
+    tipo = pd.api.types.infer_dtype(serie, skipna=False)
+    if tipo == 'string':
+        return int(serie.str.len().max())
+    if tipo == 'date':
+        return 19  # 'AAAA-MM-DD 00:00:00'
+    # Tipos mezclados: valor por valor
+    return max((len(_texto_guardado(v)) for v in map(_valor_celda, serie.tolist()) if v), default=0)
+
+
+def anchos_dataframe(df):
+    """Anchos de columna calculados sobre el DataFrame (cabecera + 2, como anchos_columnas)."""
+    return [max(len(str(c)) if c else 0, _largo_maximo(df[c])) + 2 for c in df.columns]
+
+
+class HojaEstilizada:
+    """Hoja write-only que estiliza cada fila al agregarla.
+
+    Los anchos se fijan al crearla (write-only no permite cambiarlos después);
+    luego se llama agregar() por cada fila de datos, en orden, y cerrar() con
+    la fila TOTAL. Sirve tanto para un DataFrame completo como para filas que
+    llegan por bloques. Con libro, la hoja se agrega a ese libro write-only
+    (varias hojas en un solo archivo) y se termina con terminar().
+    """
+
+    def __init__(self, columnas, anchos, keywords_map, alineacion_cabecera='center',
+                 grafico=False, montos_texto=False, estilo='completo', ancho_maximo=ANCHO_MAXIMO,
+                 libro=None, titulo='Sheet1'):
+        opciones = ESTILOS[estilo]
+        self.columnas = columnas = list(columnas)
+        self.n_cols = len(columnas)
+        self.keywords_map = keywords_map
+        self.grafico = grafico
+        self.montos_texto = montos_texto
+
+        if opciones['relleno_categoria']:
+            color_map = dict.fromkeys(keywords_map, _relleno(opciones['relleno_categoria']))
+        else:
+            color_map = {col: _relleno(PALETA[i % len(PALETA)]) for i, col in enumerate(keywords_map)}
+        self.rellenos_cat = [color_map.get(col) for col in columnas]
+        self.resaltar = resaltar = opciones['resaltar_filas']
+        self.concepto_idx = columnas.index('Concepto / Referencia') if resaltar and 'Concepto / Referencia' in columnas else None
+        self.abono_idx = columnas.index('Abono') if resaltar and 'Abono' in columnas else None
+        self.redond_idx = columnas.index('Redond') if opciones['colores_redond'] and 'Redond' in columnas else None
+        self.formato_montos = FORMATO_MONTO if opciones['formato_montos'] else None
+
+        # Tablas de estilos compartidos: el código de cada celda combina un
+        # índice de cada una (ver agregar_filas) y se resuelve en self.estilos
+        self.formatos = [None, self.formato_montos, FORMATO_FECHA]
+        self.formato_numero = 1 if self.formato_montos else 0
+        self.fuentes = [None, redond_fonts[-1], redond_fonts[0], redond_fonts[1]]  # índice = signo + 2
+        self.rellenos = [None, alt_fill, abono_fill, deposito_fill, traspaso_fill]
+        self.indice_cat = []
+        for relleno in self.rellenos_cat:
+            if relleno is not None and relleno not in self.rellenos:
+                self.rellenos.append(relleno)
+            self.indice_cat.append(self.rellenos.index(relleno) if relleno is not None else 0)
+        self.estilos = {}
+
+        self.wb = libro if libro is not None else Workbook(write_only=True)
+        self.ws = ws = self.wb.create_sheet(titulo)
+
+        # Anchos, freeze y autofiltro (deben definirse antes de escribir filas)
+        for i, ancho in enumerate(anchos, start=1):
+            if ancho_maximo:
+                ancho = min(ancho, ancho_maximo)
+            ws.column_dimensions[get_column_letter(i)].width = ancho
+        ws.freeze_panes = 'B2'
+        ws.auto_filter.ref = f"A1:{get_column_letter(self.n_cols)}1"
+
+        # Cabecera
+        cabecera = []
+        alineacion = Alignment(horizontal=alineacion_cabecera, vertical=opciones['cabecera_vertical'])
+        for col in columnas:
+            cell = WriteOnlyCell(ws, col)
+            if opciones['cabecera_fill']:
+                cell.fill = opciones['cabecera_fill']
+            cell.font = opciones['cabecera_font']
+            cell.border = header_border
+            cell.alignment = alineacion
+            cabecera.append(cell)
+        ws.append(cabecera)
+        self.celdas_estilizadas = self.n_cols
+        self.fila_actual = 1  # última fila escrita en la hoja
+
+    def _montos_texto(self, fila):
+        # Montos guardados como texto "monto (asiento)"
+        valores = list(fila)
+        for c, v in enumerate(valores):
+            if isinstance(v, str) and ' (' in v:
+                try:
+                    monto = float(v.split(' (')[0])
+                    valores[c] = f"{monto:,.2f} ({v.split(' (')[1]}"
+                except ValueError:
+                    pass
+        return valores
+
+    def _estilo(self, codigo):
+        """StyleArray compartido para un código de estilo (se arma una sola vez)."""
+        estilo = self.estilos.get(codigo)
+        if estilo is None:
+            resto, formato = divmod(codigo, len(self.formatos))
+            resto, borde = divmod(resto, 2)
+            relleno, fuente = divmod(resto, len(self.fuentes))
+            cell = WriteOnlyCell(self.ws)
+            if self.formatos[formato]:
+                cell.number_format = self.formatos[formato]
+            if self.rellenos[relleno] is not None:
+                cell.fill = self.rellenos[relleno]
+            if self.fuentes[fuente] is not None:
+                cell.font = self.fuentes[fuente]
+            if borde:
+                cell.border = separador_border
+            estilo = self.estilos[codigo] = cell._style
+        return estilo
+
+    def agregar_filas(self, filas, separar=None):
+        """Escribe varias filas de datos; separar[i] dibuja la línea inferior de la fila i.
+
+        El estilo de cada celda se calcula por columna con máscaras de numpy
+        (montos, coincidencias de categoría, signo de Redond, filas pares y
+        cambios de día) y se reduce a un código; cada código usa un mismo
+        estilo compartido, de modo que cada celda se escribe una sola vez.
+        """
+        n = len(filas)
+        if not n:
+            return
+        if self.montos_texto:
+            filas = [self._montos_texto(f) for f in filas]
+        pares = (np.arange(self.fila_actual + 1, self.fila_actual + n + 1) % 2 == 0)
+        borde = np.zeros(n, dtype=np.int64) if separar is None else np.asarray(separar, dtype=np.int64)
+
+        codigos = np.empty((n, self.n_cols), dtype=np.int64)
+        for c in range(self.n_cols):
+            col = np.empty(n, dtype=object)
+            col[:] = [f[c] for f in filas]
+            numero = _mascara_numero(col)
+            formato = np.where(numero, self.formato_numero, np.where(_mascara_fecha(col), 2, 0))
+
+            relleno = np.zeros(n, dtype=np.int64)
+            if self.indice_cat[c]:
+                relleno[_mascara_con_valor(col)] = self.indice_cat[c]
+            if c == self.concepto_idx:
+                texto = pd.Series(col).astype(str).str.lower()
+                relleno[texto.str.contains('traspaso', regex=False).to_numpy()] = _TRASPASO
+                relleno[texto.str.contains('deposito en efectivo', regex=False).to_numpy()] = _DEPOSITO
+            if c == self.abono_idx:
+                relleno[:] = _ABONO
+            if self.resaltar:
+                relleno[(relleno == 0) & pares] = _ALTERNA
+
+            fuente = np.zeros(n, dtype=np.int64)
+            if c == self.redond_idx:
+                signo = np.zeros(n, dtype=np.int64)
+                signo[numero] = np.sign(col[numero].astype(float))
+                fuente[numero] = signo[numero] + 2
+
+            codigos[:, c] = ((relleno * len(self.fuentes) + fuente) * 2 + borde) * len(self.formatos) + formato
+
+        self.celdas_estilizadas += int(np.count_nonzero(codigos))
+        ws = self.ws
+        for fila, codigos_fila in zip(filas, codigos.tolist()):
+            celdas = []
+            for v, codigo in zip(fila, codigos_fila):
+                if codigo:
+                    cell = WriteOnlyCell(ws, v)
+                    cell._style = self._estilo(codigo)
+                    celdas.append(cell)
+                else:
+                    celdas.append(v)
+            ws.append(celdas)
+        self.fila_actual += n
+
+    def agregar(self, fila, separar=False):
+        """Escribe una fila de datos; separar dibuja la línea inferior (último renglón del día)."""
+        self.agregar_filas([fila], [separar])
+
+    def _agregar_total(self, total):
+        if self.montos_texto:
+            total = self._montos_texto(total)
+        celdas = []
+        for v in total:
+            cell = WriteOnlyCell(self.ws, v)
+            if _es_numero(v):
+                if self.formato_montos:
+                    cell.number_format = self.formato_montos
+            elif isinstance(v, datetime.date):
+                cell.number_format = FORMATO_FECHA
+            cell.fill = total_fill
+            cell.font = total_font
+            cell.alignment = total_alignment
+            celdas.append(cell)
+        self.ws.append(celdas)
+        self.celdas_estilizadas += len(celdas)
+        self.fila_actual += 1
+
+    def cerrar(self, ruta_salida, total):
+        """Escribe la fila TOTAL, el gráfico si se pidió y guarda el libro."""
+        self.terminar(total)
+        self.wb.save(ruta_salida)
+        return self.celdas_estilizadas
+
+    def terminar(self, total):
+        """Escribe la fila TOTAL y el gráfico si se pidió, sin guardar el libro."""
+        self._agregar_total(total)
+        ultima = self.fila_actual
+
+        # Gráfico de resumen
+        if self.grafico:
+            from openpyxl.chart import BarChart, Reference  # solo Tcomunicamos lo usa
+
+            primera_cat = self.columnas.index(next(iter(self.keywords_map))) + 1
+            ultima_cat = primera_cat + len(self.keywords_map) - 1
+            chart = BarChart()
+            chart.title = 'Resumen Totales por Categor%C3%ADa'
+            cats = Reference(self.ws, min_row=1, min_col=primera_cat, max_col=ultima_cat)
+            vals = Reference(self.ws, min_row=ultima, min_col=primera_cat, max_col=ultima_cat)
+            chart.add_data(vals, titles_from_data=False)
+            chart.set_categories(cats)
+            ws_chart = self.wb.create_sheet('Resumen')
+            ws_chart.add_chart(chart, 'A1')
+        return self.celdas_estilizadas
+
+    def descartar(self):
+        """Cancelado o error a mitad de la escritura: cerrar y borrar el temporal."""
+        self.ws.close()
+        self.ws._writer.cleanup()
+
+
+def exportar_excel(df_grouped, ruta_salida, keywords_map, alineacion_cabecera='center',
+                   grafico=False, montos_texto=False, progreso=None, estilo='completo',
+                   ancho_maximo=ANCHO_MAXIMO):
+    """Escribe df_grouped (con fila TOTAL al final) ya estilizado, en una sola pasada.
+
+    Usa un libro write-only: cada fila se estiliza y se envía al archivo sin
+    volver a cargarlo con load_workbook. Devuelve cuántas celdas llevan estilo.
+    progreso(etapa, hecho, total) se llama cada CADA_FILAS filas escritas.
+    estilo es una de las variantes de ESTILOS; los anchos salen del DataFrame
+    con tope en ancho_maximo.
+    """
+    hoja = HojaEstilizada(df_grouped.columns, anchos_dataframe(df_grouped), keywords_map,
+                          alineacion_cabecera, grafico, montos_texto, estilo, ancho_maximo)
+    total = escribir_filas(hoja, df_grouped, progreso)
+    return hoja.cerrar(ruta_salida, total)
+
+
+def escribir_filas(hoja, df_grouped, progreso=None):
+    """Escribe en hoja las filas de df_grouped salvo la última; devuelve esa fila (TOTAL)."""
+    filas = [[_valor_celda(v) for v in fila] for fila in df_grouped.itertuples(index=False, name=None)]
+
+    # Línea separadora entre fechas: se marca la fila anterior al cambio de Día
+    separar = [False] * len(filas)
+    last = None
+    for i, fila in enumerate(filas[:-1]):
+        curr = fila[1]
+        if last and curr != last:
+            separar[i - 1] = True
+        last = curr
+
+    try:
+        for i in range(0, len(filas) - 1, CADA_FILAS):
+            if progreso:
+                progreso('exportacion', i, len(filas))
+            fin = min(i + CADA_FILAS, len(filas) - 1)
+            hoja.agregar_filas(filas[i:fin], separar[i:fin])
+    except BaseException:
+        hoja.descartar()
+        raise
+
+    if progreso:
+        progreso('exportacion', len(filas), len(filas))
+    return filas[-1]
+
+
+def hoja_resumen(libro, totales, columnas, keywords_map, titulo='Resumen'):
+    """Hoja con una fila por banco (su fila TOTAL) y un gráfico de categorías por banco.
+
+    totales es una lista de (banco, dict columna -> monto); columnas son los
+    montos a mostrar. Las categorías de keywords_map van primero y al gráfico.
+    """
+    from openpyxl.chart import BarChart, Reference
+
+    columnas = [c for c in columnas if c in keywords_map] + [c for c in columnas if c not in keywords_map]
+    ws = libro.create_sheet(titulo)
+    encabezado = ['Banco'] + list(columnas)
+    anchos = anchos_columnas([[banco] + [t.get(c) for c in columnas] for banco, t in totales], encabezado)
+    for i, ancho in enumerate(anchos, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = ancho
+    ws.freeze_panes = 'B2'
+
+    cabecera = []
+    for col in encabezado:
+        cell = WriteOnlyCell(ws, col)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.border = header_border
+        cell.alignment = total_alignment
+        cabecera.append(cell)
+    ws.append(cabecera)
+
+    def fila_montos(nombre, valores, es_total=False):
+        celdas = [WriteOnlyCell(ws, nombre)]
+        for v in valores:
+            cell = WriteOnlyCell(ws, v)
+            cell.number_format = FORMATO_MONTO
+            celdas.append(cell)
+        for cell in celdas:
+            if es_total:
+                cell.fill = total_fill
+                cell.font = total_font
+        ws.append(celdas)
+
+    for banco, total in totales:
+        fila_montos(banco, [total.get(c) or 0 for c in columnas])
+    # Suma entre bancos en centavos (como la fila TOTAL de cada hoja)
+    fila_montos('TOTAL', [sum(round((t.get(c) or 0) * 100) for _, t in totales) / 100 for c in columnas],
+                es_total=True)
+
+    # Gráfico combinado: una serie por banco sobre las categorías
+    n_cat = sum(1 for c in columnas if c in keywords_map)
+    if n_cat and totales:
+        chart = BarChart()
+        chart.title = 'Totales por categoría y banco'
+        chart.width, chart.height = 24, 12
+        datos = Reference(ws, min_col=1, max_col=n_cat + 1, min_row=2, max_row=len(totales) + 1)
+        chart.add_data(datos, from_rows=True, titles_from_data=True)
+        chart.set_categories(Reference(ws, min_col=2, max_col=n_cat + 1, min_row=1))
+        ws.add_chart(chart, f'A{len(totales) + 4}')
+    return ws
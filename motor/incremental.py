@@ -0,0 +1,111 @@
+# =============================
+# Modo incremental para estados de cuenta del mes en curso
+# =============================
+# El export del mes se vuelve a bajar cada día con unos cuantos asientos más.
+# Se guarda (en la caché, ver motor/cache.py) la fila agrupada y una huella
+# del contenido de cada asiento; en la corrida siguiente solo se clasifican y
+# agrupan los asientos nuevos o modificados, se quitan los que ya no están y
+# el resto se toma tal cual del estado anterior. Numeración y fila TOTAL se
+# recalculan sobre el resultado combinado.
+#
+# El resultado es idéntico al de una corrida completa: cada asiento se agrupa
+# solo con sus propias líneas y el orden es el mismo (asientos ordenados y
+# vacíos al final). El .xlsx sí se vuelve a escribir completo: openpyxl no
+# reescribe filas sueltas de un libro existente.
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from motor.perfiles import obtener_perfil
+
+# Cambia si cambia la forma del estado guardado
+_VERSION_ESTADO = 1
+
+
+def clave_estado(perfil, ruta_salida):
+    """Clave del estado: salida + perfil + versión del código."""
+    from motor.cache import version_codigo
+
+    h = hashlib.sha256(os.path.abspath(ruta_salida).encode())
+    h.update(version_codigo().encode())
+    h.update(json.dumps(perfil, sort_keys=True, ensure_ascii=False, default=str).encode())
+    return h.hexdigest()[:32]
+
+
+def huellas_asientos(df):
+    """Código de asiento por fila, claves (en orden de agrupación) y huella de cada asiento.
+
+    La huella combina el contenido de cada línea con su posición dentro del
+    asiento: cambia si se agrega, quita, reordena o modifica una línea.
+    """
+    codigos, claves = pd.factorize(df['Asiento contable'], sort=True, use_na_sentinel=False)
+    posicion = pd.Series(codigos).groupby(codigos).cumcount().to_numpy()
+    lineas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    lineas = lineas ^ pd.util.hash_array(posicion.astype(np.uint64))
+    huellas = np.zeros(len(claves), dtype=np.uint64)
+    np.add.at(huellas, codigos, lineas)  # suma módulo 2**64
+    claves = [None if pd.isna(k) else k for k in claves]
+    return codigos, claves, huellas
+
+
+def agrupar_incremental(perfil, ruta_entrada, ruta_salida, medicion, entrada_sha256=None):
+    """Como transformador.agrupar_estado, reutilizando los asientos sin cambios.
+
+    Devuelve el DataFrame agrupado con la fila TOTAL. En la etapa
+    'incremental' se anotan asientos nuevos, cambiados, borrados y
+    reutilizados; el reporte de traslapes solo cubre lo que se clasificó.
+    """
+    from motor.cache import cargar_estado, guardar_estado
+    from motor.clasificacion import agregar_totales
+    from motor.transformador import clasificar_y_agrupar, leer_movimientos
+
+    perfil = obtener_perfil(perfil)
+    df = leer_movimientos(perfil, ruta_entrada, medicion, entrada_sha256)
+
+    # Asientos a procesar: los que no están en el estado o cambió su huella
+    with medicion.etapa('incremental') as etapa:
+        clave = clave_estado(perfil, ruta_salida)
+        estado = cargar_estado(clave)
+        if estado is not None and estado.get('version') != _VERSION_ESTADO:
+            estado = None
+        codigos, claves, huellas = huellas_asientos(df)
+        previas = {}
+        if estado is not None:
+            previas = {k: i for i, k in enumerate(estado['claves'])}
+        reusar = np.array([previas.get(k, -1) for k in claves], dtype=np.int64)
+        conocidos = reusar >= 0
+        if conocidos.any():
+            iguales = estado['huellas'][reusar[conocidos]] == huellas[conocidos]
+            reusar[np.flatnonzero(conocidos)[~iguales]] = -1
+        procesar = reusar < 0
+        etapa['nuevos'] = int((~conocidos).sum())
+        etapa['cambiados'] = int((conocidos & procesar).sum())
+        etapa['borrados'] = len(previas) - int(conocidos.sum())
+        etapa['reutilizados'] = int((~procesar).sum())
+
+    if procesar.any() or not len(claves):
+        df_nuevo = clasificar_y_agrupar(perfil, df[procesar[codigos]], medicion)
+    else:
+        df_nuevo = None
+        medicion.reporte['traslapes'] = {'total': 0, 'lineas': []}
+
+    # Combinar en el orden de agrupación: nuevos en su posición, el resto del estado
+    with medicion.etapa('combinacion'):
+        if df_nuevo is None or not procesar.all():
+            previo = estado['agrupado'].iloc[reusar[~procesar]]
+            partes = [p for p in (previo, df_nuevo) if p is not None and len(p)]
+            orden = np.concatenate([np.flatnonzero(~procesar), np.flatnonzero(procesar)])
+            df_grouped = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+            df_grouped = df_grouped.iloc[np.argsort(orden)].reset_index(drop=True)
+        else:
+            df_grouped = df_nuevo
+        guardar_estado(clave, {'version': _VERSION_ESTADO, 'claves': claves, 'huellas': huellas,
+                               'agrupado': df_grouped})
+
+    # Numeración y fila TOTAL
+    with medicion.etapa('totales'):
+        df_grouped = agregar_totales(df_grouped.copy(), **perfil['totales'])
+    return df_grouped
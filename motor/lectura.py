@@ -0,0 +1,285 @@
+# =============================
+# Lectura de estados de cuenta exportados de Odoo
+# =============================
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# Columnas que usa la transformación (el resto del export no se lee)
+COLUMNAS = [
+    'Asiento contable',
+    'Fecha',
+    'Importe',
+    'Partner',
+    'Referencia',
+    'Líneas de factura',
+    'Líneas de factura/Débito',
+    'Líneas de factura/Crédito',
+]
+
+# Renglones por bloque en la lectura por bloques (leer_por_bloques)
+FILAS_BLOQUE = 50_000
+
+# Tipos explícitos para no pagar la inferencia; Fecha y Referencia se dejan
+# como vienen (fechas de Excel y referencias casi siempre vacías).
+TIPOS = {
+    'Asiento contable': str,
+    'Partner': str,
+    'Líneas de factura': str,
+}
+
+# Texto muy repetido (un asiento tiene varias líneas, pocos partners): se
+# guarda como categoría, códigos enteros más una copia de cada valor distinto
+CATEGORICAS = ['Asiento contable', 'Partner', 'Referencia']
+
+# Montos: se leen como vengan y se convierten una sola vez a float64 con
+# convertir_montos (aceptan texto con separador de miles y negativos entre paréntesis)
+MONTOS = ['Importe', 'Líneas de factura/Débito', 'Líneas de factura/Crédito']
+
+
+def _calamine_disponible():
+    # pandas >= 2.2 trae el motor 'calamine' si python-calamine está instalado
+    version = tuple(int(p) for p in pd.__version__.split('.')[:2])
+    return version >= (2, 2) and importlib.util.find_spec('python_calamine') is not None
+
+
+# Motores en orden de preferencia: (nombre, ¿disponible?). 'calamine' lee la
+# hoja completa con read_excel; 'openpyxl' la recorre por bloques con memoria
+# acotada (más lento, siempre disponible).
+MOTORES = [
+    ('calamine', _calamine_disponible),
+    ('openpyxl', lambda: True),
+]
+
+
+def motor_lectura(preferido=None):
+    """Nombre del motor a usar: el preferido o el más rápido disponible."""
+    if preferido:
+        return preferido
+    for nombre, disponible in MOTORES:
+        if disponible():
+            return nombre
+    return 'openpyxl'
+
+
+def a_numero(serie):
+    """Convierte una columna de montos a float64.
+
+    Los números pasan tal cual; el texto acepta '$', espacios, separador de
+    miles con coma ('1,234.56') y negativos contables entre paréntesis
+    ('(1,234.56)'). Lo que no es un monto ('-', vacío) queda como NaN.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype('float64')
+    texto = serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+    negativo = (texto.str.startswith('(') & texto.str.endswith(')')).to_numpy()
+    texto = texto.str.strip('()').str.replace(r'[\s$,]', '', regex=True)
+    valores = pd.to_numeric(texto, errors='coerce').astype('float64')
+    return valores.where(~negativo, -valores)
+
+
+def convertir_montos(df):
+    """Deja Importe, Débito y Crédito como float64 (ver a_numero)."""
+    for col in MONTOS:
+        if col in df.columns:
+            df[col] = a_numero(df[col])
+    return df
+
+
+def a_categorias(df):
+    """Pasa a categoría las columnas de texto de CATEGORICAS (las numéricas se quedan)."""
+    for col in CATEGORICAS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]) \
+                and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def validar_columnas(columnas):
+    """ValueError con las columnas de COLUMNAS que no trae el export."""
+    faltantes = [c for c in COLUMNAS if c not in set(columnas)]
+    if faltantes:
+        raise ValueError("El archivo no parece un estado de cuenta de Odoo: "
+                         f"faltan las columnas {', '.join(faltantes)}")
+
+
+def leer_estado_cuenta(ruta_entrada, motor=None, filas_bloque=FILAS_BLOQUE):
+    """Lee solo las columnas necesarias del export, con tipos explícitos y montos numéricos.
+
+    Con openpyxl la hoja se recorre por bloques de filas_bloque renglones y
+    Asiento/Partner se codifican como categoría sobre la marcha: nunca se
+    tiene la hoja completa como texto en memoria. Con otro motor
+    ('calamine') se usa read_excel.
+    """
+    motor = motor_lectura(motor)
+    if motor == 'openpyxl':
+        return _leer_acotado(ruta_entrada, filas_bloque)
+    df = pd.read_excel(
+        ruta_entrada,
+        engine=motor,
+        usecols=lambda c: c in COLUMNAS,
+        dtype=TIPOS,
+    )
+    validar_columnas(df.columns)
+    return a_categorias(convertir_montos(df))
+
+
+def _codificar(serie, vistos):
+    # Códigos del bloque en la numeración global vistos (valor -> código); faltantes -> -1
+    codigos, unicos = pd.factorize(serie)
+    mapa = np.array([vistos.setdefault(u, len(vistos)) for u in unicos] + [-1], dtype=np.int32)
+    return mapa[codigos]
+
+
+def _categoria(codigos, vistos):
+    # Categoría con los valores ordenados, como astype('category')
+    valores = np.array(list(vistos), dtype=object)
+    orden = np.argsort(valores, kind='stable')
+    nuevo = np.empty(len(orden) + 1, dtype=np.int32)
+    nuevo[orden] = np.arange(len(orden), dtype=np.int32)
+    nuevo[-1] = -1
+    return pd.Categorical.from_codes(nuevo[codigos], categories=pd.Index(valores[orden]))
+
+
+def _unir(partes):
+    # Une los bloques de una columna; si los tipos inferidos no coinciden
+    # (p. ej. un bloque sin fechas) se vuelve a inferir sobre la columna completa
+    serie = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    if len({p.dtype for p in partes}) > 1:
+        serie = pd.Series(serie.tolist())
+    return serie
+
+
+def _leer_acotado(ruta_entrada, filas_bloque=FILAS_BLOQUE):
+    # leer_por_bloques reunido en un solo DataFrame: cada bloque se reduce
+    # (categorías, float64) antes de leer el siguiente
+    vistos = {'Asiento contable': {}, 'Partner': {}}
+    partes = {}
+    for bloque, _, _ in leer_por_bloques(ruta_entrada, filas_bloque):
+        for col in bloque.columns:
+            serie = bloque[col]
+            if col in vistos:
+                serie = _codificar(serie, vistos[col])
+            partes.setdefault(col, []).append(serie)
+        del bloque, serie
+
+    columnas = {}
+    for col in list(partes):
+        if col in vistos:
+            columnas[col] = _categoria(np.concatenate(partes.pop(col)), vistos.pop(col))
+        else:
+            columnas[col] = _unir(partes.pop(col))
+    return a_categorias(pd.DataFrame(columnas))
+
+
+def _texto_celda(v):
+    # Igual que read_excel(dtype=str): enteros sin ".0"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _bloque_a_dataframe(filas, nombres):
+    columnas = {}
+    for i, nombre in enumerate(nombres):
+        valores = [fila[i] for fila in filas]
+        tipo = TIPOS.get(nombre)
+        if tipo is str:
+            columnas[nombre] = pd.Series([v if v is None or isinstance(v, str) else _texto_celda(v)
+                                          for v in valores], dtype=object)
+        elif nombre in MONTOS:
+            columnas[nombre] = a_numero(pd.Series(valores))
+        else:
+            # Fecha/Referencia: se infiere el tipo como lo hace read_excel
+            columnas[nombre] = pd.Series([np.nan if v is None else v for v in valores])
+    return pd.DataFrame(columnas)
+
+
+def leer_por_bloques(ruta_entrada, filas_bloque=FILAS_BLOQUE):
+    """Lee el export en bloques de filas_bloque renglones sin cargar la hoja completa.
+
+    Genera (DataFrame, filas leídas, filas totales) con las mismas columnas y
+    tipos que leer_estado_cuenta; filas totales es la dimensión que declara la
+    hoja (None si no la trae).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta_entrada, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = ws.max_row - 1 if ws.max_row else None
+        filas = ws.iter_rows(values_only=True)
+        cabecera = next(filas, ())
+        indices, nombres = [], []
+        for i, col in enumerate(cabecera):
+            if col in COLUMNAS and col not in nombres:
+                indices.append(i)
+                nombres.append(col)
+        validar_columnas(nombres)
+
+        bloque, leidas = [], 0
+        for fila in filas:
+            bloque.append([fila[i] if i < len(fila) else None for i in indices])
+            if len(bloque) == filas_bloque:
+                leidas += len(bloque)
+                yield _bloque_a_dataframe(bloque, nombres), leidas, total
+                bloque = []
+        if bloque or not leidas:
+            leidas += len(bloque)
+            yield _bloque_a_dataframe(bloque, nombres), leidas, total
+    finally:
+        wb.close()
+
+
+def preparar_movimientos(df, propagar=True, solo_con_importe=False, previos=None):
+    """Filtra Importe negativo, propaga Asiento/Fecha y agrega auxiliares de búsqueda.
+
+    Con solo_con_importe=True se quedan únicamente las filas de banco (con
+    Importe y Asiento); con propagar=False no se copian Asiento/Fecha a las
+    filas de detalle. previos trae el último Asiento/Fecha del bloque anterior
+    cuando se lee por bloques.
+    """
+    # Filtrar filas con Importe negativo (Importe ya es numérico; NaN se queda);
+    # sin negativos no se copia el DataFrame
+    negativos = (df['Importe'] < 0).to_numpy()
+    if negativos.any():
+        df = df[~negativos]
+    if solo_con_importe:
+        df = df[(df['Importe'] >= 0) & df['Asiento contable'].notna()]
+
+    # Propagar Asiento contable y Fecha a filas de detalle
+    if propagar:
+        df['Asiento contable'] = df['Asiento contable'].ffill()
+        df['Fecha'] = df['Fecha'].ffill()
+        # Las primeras filas de un bloque continúan el último asiento del anterior
+        for col, valor in (previos or {}).items():
+            if valor is not None and df[col].isna().any():
+                df[col] = df[col].fillna(valor)
+
+    # Auxiliares minúsculas para búsqueda (la instantánea ya las trae)
+    if 'linea' not in df.columns:
+        df = agregar_auxiliares(df)
+    return df
+
+
+def minusculas(serie):
+    """Texto en minúsculas ('' si falta), convirtiendo una sola vez cada valor distinto.
+
+    Si los valores se repiten (menos de la mitad son distintos) el resultado
+    es una categoría; si no, texto normal.
+    """
+    codigos, unicos = pd.factorize(serie)  # faltantes -> -1
+    valores = np.append(pd.Index(unicos).astype(str).str.lower().to_numpy(dtype=object), '')
+    if len(unicos) * 2 < len(serie):
+        # Dos valores pueden coincidir ya en minúsculas: se vuelven a factorizar
+        recodigos, categorias = pd.factorize(valores)
+        return pd.Categorical.from_codes(recodigos[codigos], categorias)
+    return valores[codigos]
+
+
+def agregar_auxiliares(df):
+    """Agrega linea/partner en minúsculas para la búsqueda de palabras clave."""
+    df['linea'] = minusculas(df['Líneas de factura'])
+    df['partner'] = minusculas(df['Partner'])
+    return df
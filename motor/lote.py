@@ -0,0 +1,124 @@
+# =============================
+# Procesamiento por lotes (sin interfaz gráfica)
+# =============================
+# Uso:
+#   python -m motor.lote rm "RM/para procesar" RM/resultados
+#   python -m motor.lote tcomunicamos entrada/ salida/ --procesos 4
+#   python -m motor.lote pruebas RM/pruebas RM/resultados_pruebas
+#   python -m motor.lote rm "RM/para procesar" RM/resultados --incremental
+import argparse
+import csv
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from motor.perfiles import PERFILES, obtener_perfil
+from motor.transformador import transformar_excel
+
+
+def cargar_transformador(empresa):
+    """Devuelve transformar_excel(ruta_entrada, ruta_salida, ...) con el perfil de la empresa."""
+    obtener_perfil(empresa)  # valida el nombre antes de encolar trabajo
+    return functools.partial(transformar_excel, empresa)
+
+
+def listar_entradas(carpeta):
+    # Solo libros .xlsx, sin los temporales de Excel (~$archivo.xlsx)
+    return sorted(
+        os.path.join(carpeta, f) for f in os.listdir(carpeta)
+        if f.lower().endswith('.xlsx') and not f.startswith('~$')
+    )
+
+
+def procesar_archivo(empresa, ruta_entrada, ruta_salida, incremental=False):
+    """Transforma un archivo y devuelve su estado; nunca lanza excepción."""
+    inicio = time.perf_counter()
+    try:
+        if os.path.exists(ruta_salida) and os.path.samefile(ruta_entrada, ruta_salida):
+            raise ValueError('la salida es el mismo archivo que la entrada; no se sobrescribe')
+        cargar_transformador(empresa)(ruta_entrada, ruta_salida, incremental=incremental)
+        estado, error = 'ok', ''
+    except Exception as e:
+        estado, error = 'error', f'{type(e).__name__}: {e}'
+    return {
+        'archivo': os.path.basename(ruta_entrada),
+        'salida': ruta_salida if estado == 'ok' else '',
+        'estado': estado,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'error': error,
+    }
+
+
+def procesar_carpeta(empresa, carpeta_entrada, carpeta_salida, procesos=None, al_terminar=None,
+                     incremental=False):
+    """Transforma todos los .xlsx de carpeta_entrada en paralelo.
+
+    Devuelve la lista de estados por archivo (en el orden de la carpeta) y
+    escribe resumen_lote.csv en carpeta_salida. Un archivo con error no
+    detiene a los demás. Con incremental=True cada archivo solo reclasifica
+    los asientos nuevos o cambiados desde la corrida anterior. carpeta_salida
+    no puede ser carpeta_entrada: cada salida se llama igual que su entrada.
+    """
+    obtener_perfil(empresa)
+    if os.path.realpath(carpeta_salida) == os.path.realpath(carpeta_entrada):
+        raise ValueError('La carpeta de salida debe ser distinta de la de entrada '
+                         '(los archivos generados reemplazarían a los originales)')
+    os.makedirs(carpeta_salida, exist_ok=True)
+    entradas = listar_entradas(carpeta_entrada)
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(procesar_archivo, empresa, ruta,
+                        os.path.join(carpeta_salida, os.path.basename(ruta)), incremental): ruta
+            for ruta in entradas
+        }
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                res = futuro.result()
+            except Exception as e:
+                # El proceso trabajador murió (memoria, señal...)
+                res = {'archivo': os.path.basename(ruta), 'salida': '', 'estado': 'error',
+                       'segundos': 0.0, 'error': f'{type(e).__name__}: {e}'}
+            resultados[ruta] = res
+            if al_terminar:
+                al_terminar(res)
+
+    estados = [resultados[ruta] for ruta in entradas]
+    with open(os.path.join(carpeta_salida, 'resumen_lote.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['archivo', 'salida', 'estado', 'segundos', 'error'])
+        writer.writeheader()
+        writer.writerows(estados)
+    return estados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transforma todos los estados de cuenta de una carpeta.')
+    parser.add_argument('empresa', choices=sorted(PERFILES))
+    parser.add_argument('entrada', help='Carpeta con los .xlsx exportados de Odoo')
+    parser.add_argument('salida', help='Carpeta donde se guardan los archivos generados')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, uno por núcleo)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Solo reclasifica los asientos nuevos o cambiados desde la corrida anterior')
+    args = parser.parse_args(argv)
+
+    def mostrar(res):
+        marca = '✅' if res['estado'] == 'ok' else '❌'
+        print(f"{marca} {res['archivo']} ({res['segundos']:.2f} s) {res['error']}".rstrip(), flush=True)
+
+    inicio = time.perf_counter()
+    try:
+        estados = procesar_carpeta(args.empresa, args.entrada, args.salida, args.procesos, mostrar,
+                                   args.incremental)
+    except ValueError as e:
+        parser.error(str(e))
+    errores = sum(1 for e in estados if e['estado'] != 'ok')
+    print(f'{len(estados)} archivos, {errores} con error, {time.perf_counter() - inicio:.2f} s en total.')
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
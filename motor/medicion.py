@@ -0,0 +1,167 @@
+# =============================
+# Medición por etapas y perfilado opcional
+# =============================
+# Perfilado sin tocar código: definir la variable de entorno
+#   TRANSFORMADOR_PERFIL=cprofile     -> <salida>.prof
+#   TRANSFORMADOR_PERFIL=pyinstrument -> <salida>.perfil.html
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+VARIABLE_PERFIL = 'TRANSFORMADOR_PERFIL'
+
+# Cada cuánto se muestrea la memoria residente durante una etapa
+INTERVALO_MEMORIA_S = 0.01
+
+
+def pico_memoria_mb():
+    """Pico de memoria residente de toda la vida del proceso (None si no se puede medir)."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo reporta en KB y macOS en bytes
+        return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def memoria_actual_mb():
+    """Memoria residente actual del proceso (None si no se puede medir)."""
+    try:
+        # Linux: páginas residentes en /proc/self/statm
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+class _PicoEtapa(threading.Thread):
+    # Pico de memoria residente mientras dura una etapa, muestreando
+    # memoria_actual_mb; ru_maxrss no sirve porque es el de todo el proceso.
+    # Es aproximado: un pico más corto que el intervalo puede no verse.
+
+    def __init__(self):
+        super().__init__(name='pico-etapa', daemon=True)
+        self.pico = memoria_actual_mb()
+        self._fin = threading.Event()
+
+    def _muestrear(self):
+        actual = memoria_actual_mb()
+        if actual is not None and (self.pico is None or actual > self.pico):
+            self.pico = actual
+
+    def run(self):
+        while not self._fin.wait(INTERVALO_MEMORIA_S):
+            self._muestrear()
+
+    def terminar(self):
+        self._fin.set()
+        self.join()
+        self._muestrear()
+        return self.pico
+
+
+class Medicion:
+    """Acumula tiempos, conteos y memoria de cada etapa de una transformación.
+
+    pico_rss_mb de cada etapa es el pico de memoria residente durante esa
+    etapa; el del reporte, el mayor de las etapas. pico_proceso_mb es el de
+    toda la vida del proceso (ru_maxrss), que incluye trabajo anterior.
+    """
+
+    def __init__(self, transformador, ruta_entrada, ruta_salida, progreso=None):
+        self.progreso = progreso
+        self.reporte = {
+            'transformador': transformador,
+            'entrada': os.path.abspath(ruta_entrada),
+            'salida': os.path.abspath(ruta_salida),
+            'etapas': {},
+        }
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide una etapa; el dict que entrega sirve para anotar conteos.
+
+        Si la etapa se repite (lectura por bloques) se suman tiempos y conteos.
+        """
+        if self.progreso:
+            self.progreso(nombre)
+        datos = {}
+        pico = _PicoEtapa()
+        pico.start()
+        inicio = time.perf_counter()
+        try:
+            yield datos
+        finally:
+            medida = {
+                'segundos': time.perf_counter() - inicio,
+                'pico_rss_mb': pico.terminar(),
+                'rss_mb': memoria_actual_mb(),
+                **datos,
+            }
+            previa = self.reporte['etapas'].get(nombre)
+            if previa:
+                for clave, valor in medida.items():
+                    if clave == 'pico_rss_mb':
+                        medida[clave] = max((v for v in (valor, previa.get(clave)) if v is not None), default=None)
+                    elif clave != 'rss_mb' and isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                        medida[clave] = previa.get(clave, 0) + valor
+            medida['segundos'] = round(medida['segundos'], 4)
+            self.reporte['etapas'][nombre] = medida
+
+    def finalizar(self, guardar=False):
+        """Cierra el reporte y, si se pide, lo guarda junto al archivo de salida."""
+        self.reporte['total_s'] = round(time.perf_counter() - self._inicio, 4)
+        picos = [e['pico_rss_mb'] for e in self.reporte['etapas'].values() if e.get('pico_rss_mb') is not None]
+        self.reporte['pico_rss_mb'] = max(picos) if picos else None
+        self.reporte['pico_proceso_mb'] = pico_memoria_mb()
+        if guardar:
+            ruta = os.path.splitext(self.reporte['salida'])[0] + '_reporte.json'
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(self.reporte, f, indent=2, ensure_ascii=False, default=str)
+            self.reporte['ruta_reporte'] = ruta
+        return self.reporte
+
+
+@contextmanager
+def perfilar(ruta_salida, perfilador=None):
+    """Perfila el bloque con cProfile o pyinstrument si así lo pide el entorno."""
+    perfilador = (perfilador or os.environ.get(VARIABLE_PERFIL, '')).strip().lower()
+    base = os.path.splitext(ruta_salida)[0]
+
+    if perfilador == 'cprofile':
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(base + '.prof')
+    elif perfilador == 'pyinstrument':
+        from pyinstrument import Profiler
+        perfil = Profiler()
+        perfil.start()
+        try:
+            yield
+        finally:
+            perfil.stop()
+            with open(base + '.perfil.html', 'w', encoding='utf-8') as f:
+                f.write(perfil.output_html())
+    else:
+        yield
@@ -0,0 +1,131 @@
+# =============================
+# Perfiles de empresa para el transformador único
+# =============================
+# Cada perfil describe solo lo que cambia entre empresas; cada sección se
+# pasa tal cual como argumentos a la función del motor correspondiente:
+#   movimientos   -> lectura.preparar_movimientos
+#   clasificacion -> clasificacion.clasificar_lineas
+#   agrupacion    -> clasificacion.agrupar_asientos
+#   totales       -> clasificacion.agregar_totales
+#   exportacion   -> exportar.exportar_excel
+#   lectura       -> lectura.leer_estado_cuenta (opcional, p. ej. {'motor': 'openpyxl'})
+# Para un cliente nuevo basta con agregar su perfil aquí.
+#
+# Con clasificacion exclusiva cada línea suma en una sola categoría: la
+# primera de 'precedencia' que coincida (las no listadas van al final, en el
+# orden de keywords_map). Las palabras cortas y genéricas van al final.
+#
+# keywords_map y precedencia también pueden venir de reglas/<perfil>.json
+# (ver motor/reglas.py); si ese archivo existe, manda sobre lo de aquí.
+
+DEBITO = 'Líneas de factura/Débito'
+CREDITO = 'Líneas de factura/Crédito'
+
+PERFILES = {
+    'rm': {
+        'nombre': 'rm',
+        'titulo': 'Rosa Marcela',
+        'keywords_map': {
+            'Facta': ['facta'],
+            'Master': ['max'],
+            'Almacen': ['alm', 'almacen'],
+            'Comision': ['comision', 'b/2025'],
+            'Submarcell': ['submr'],
+            'Linea 9': ['linea 9', 'línea 9'],
+            'Caja de cobro': ['caja de cobro'],
+            'Traspaso': ['traspaso'],
+            'SAT': ['sat', 'servicio de administracion', 'servicios de administracion']
+        },
+        'movimientos': {},
+        'clasificacion': {
+            'exclusiva': True,
+            'precedencia': ['Traspaso', 'Caja de cobro', 'Linea 9', 'Submarcell', 'Facta',
+                            'Comision', 'Almacen', 'Master', 'SAT'],
+        },
+        # Traspaso solo suma Débito; las demás Débito + Crédito
+        'agrupacion': {'columnas_categoria': {'Traspaso': [DEBITO]}},
+        'totales': {},
+        'exportacion': {},
+    },
+    'tcomunicamos': {
+        'nombre': 'tcomunicamos',
+        'titulo': 'T Comunicamos',
+        'keywords_map': {
+            'Parque': ['f6par'],  # agregar parque si es necesario
+            'Norte': ['sexta norte'],
+            'Palacio': ['palacio'],
+            'Sendero': ['fsend'],
+            'Galeria': ['fgale'],
+            'Evento': ['evento'],
+            'KKTN 1': ['fcac1'],
+            'KKTN 2': ['fcac2'],
+            'KKTN 3': ['fcac3'],
+            'Comision': ['fcomi'],
+            'FMDIS': ['fmdis'],
+            'Traspaso': ['traspaso'],
+            'Telmov': ['telmov'],
+            'Lespago': ['lespago'],
+            'Otro': []
+        },
+        'movimientos': {},
+        'clasificacion': {
+            'exclusiva': True,
+            'precedencia': ['Traspaso', 'KKTN 1', 'KKTN 2', 'KKTN 3', 'Parque', 'Sendero', 'Galeria',
+                            'Comision', 'FMDIS', 'Telmov', 'Lespago', 'Norte', 'Palacio', 'Evento', 'Otro'],
+        },
+        # Otro solo suma Débito y Traspaso toma el Importe del movimiento
+        'agrupacion': {'columnas_categoria': {'Otro': [DEBITO], 'Traspaso': ['Importe']}},
+        'totales': {},
+        'exportacion': {'alineacion_cabecera': 'left', 'grafico': True, 'montos_texto': True},
+    },
+    # Variante anterior de RM (RM/pruebas.py): solo filas de banco, cargo y
+    # abono desde Débito/Crédito, columna Otros y formato sencillo
+    'pruebas': {
+        'nombre': 'pruebas',
+        'titulo': 'RM (pruebas)',
+        'keywords_map': {
+            'Facta': ['facta'],
+            'Master': ['max'],
+            'Almacen': ['alm', 'almacen'],
+            'Comision': ['comision'],
+            'Submarcell': ['submr'],
+            'Linea 9': ['linea 9', 'línea 9'],
+            'Caja de cobro': ['caja de cobro'],
+            'Traspaso': ['traspaso'],
+            'SAT': ['sat', 'servicio de administracion', 'servicios de administracion']
+        },
+        'movimientos': {'propagar': False, 'solo_con_importe': True},
+        'clasificacion': {
+            'exclusiva': True,
+            'precedencia': ['Traspaso', 'Caja de cobro', 'Linea 9', 'Submarcell', 'Facta',
+                            'Comision', 'Almacen', 'Master', 'SAT'],
+        },
+        'agrupacion': {
+            'columnas_defecto': [DEBITO],
+            'columna_asiento': True,
+            'cargo': DEBITO,
+            'abono': CREDITO,
+            'base_residuo': 'cargo',
+            'columna_otros': 'Otros',
+            'decimales_redond': 2,
+        },
+        'totales': {'columna_numero': 'Unnamed: 0'},
+        'exportacion': {'estilo': 'sencillo'},
+    },
+}
+
+
+def obtener_perfil(perfil):
+    """Devuelve el perfil por nombre (o el mismo dict si ya es un perfil).
+
+    Por nombre se aplican las reglas de reglas/<perfil>.* si existen.
+    """
+    from motor.reglas import aplicar_reglas
+
+    if isinstance(perfil, dict):
+        return perfil
+    try:
+        perfil = PERFILES[perfil]
+    except KeyError:
+        raise ValueError(f"Perfil desconocido: {perfil!r} (disponibles: {', '.join(sorted(PERFILES))})")
+    return aplicar_reglas(perfil)
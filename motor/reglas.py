@@ -0,0 +1,216 @@
+# =============================
+# Reglas de clasificación en archivos externos
+# =============================
+# Las palabras clave de una empresa pueden vivir fuera del código, en
+# reglas/<perfil>.json (o .toml, .yaml/.yml si PyYAML está instalado):
+#
+#   {
+#     "keywords_map": {"Facta": ["facta"], "KKTN 4": ["fcac4"], ...},
+#     "precedencia": ["Traspaso", "KKTN 4", ...]
+#   }
+#
+# Si el archivo existe reemplaza keywords_map (y precedencia, si la trae) del
+# perfil de motor/perfiles.py. obtener_perfil revisa la fecha de modificación
+# en cada transformación: la ventana o el lote en curso toman los cambios sin
+# reiniciarse. Las reglas ya validadas, el texto de su expresión y la tabla
+# palabra -> categorías se guardan en la caché (.reglas/) por archivo y
+# fecha: mientras el archivo no cambie no se vuelve a leer ni a armar el trie,
+# solo se compila la expresión una vez por proceso (re no permite guardar una
+# expresión compilada). Estos archivos entran en el límite de tamaño de la caché.
+#
+# Variables de entorno:
+#   TRANSFORMADOR_REGLAS=<carpeta>   ubicación de los archivos (por defecto reglas/)
+#
+# Uso:
+#   python -m motor.reglas rm                 muestra las reglas vigentes y su origen
+#   python -m motor.reglas rm --exportar      escribe reglas/rm.json con las del perfil
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+VARIABLE_REGLAS = 'TRANSFORMADOR_REGLAS'
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXTENSIONES = ('.json', '.toml', '.yaml', '.yml')
+
+# Reglas leídas en este proceso: ruta -> (firma del archivo, reglas)
+_cargadas = {}
+
+
+def directorio_reglas():
+    return os.environ.get(VARIABLE_REGLAS, '').strip() or os.path.join(RAIZ, 'reglas')
+
+
+def ruta_reglas(nombre):
+    """Archivo de reglas del perfil, o None si no hay."""
+    for extension in EXTENSIONES:
+        ruta = os.path.join(directorio_reglas(), nombre + extension)
+        if os.path.isfile(ruta):
+            return ruta
+    return None
+
+
+def leer_archivo(ruta):
+    """Contenido del archivo de reglas según su extensión."""
+    extension = os.path.splitext(ruta)[1].lower()
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    if extension == '.json':
+        return json.loads(contenido.decode('utf-8'))
+    if extension == '.toml':
+        import tomllib
+        return tomllib.loads(contenido.decode('utf-8'))
+    if importlib.util.find_spec('yaml') is None:
+        raise ValueError(f'{os.path.basename(ruta)}: para reglas en YAML instale PyYAML (pip install pyyaml)')
+    import yaml
+    return yaml.safe_load(contenido)
+
+
+def validar(reglas, ruta):
+    """Revisa la forma de las reglas; las palabras clave se pasan a minúsculas."""
+    archivo = os.path.basename(ruta)
+    if not isinstance(reglas, dict) or not isinstance(reglas.get('keywords_map'), dict):
+        raise ValueError(f'{archivo}: falta la tabla keywords_map')
+    sobrantes = set(reglas) - {'keywords_map', 'precedencia'}
+    if sobrantes:
+        raise ValueError(f"{archivo}: claves desconocidas: {', '.join(sorted(sobrantes))}")
+    keywords_map = {}
+    for categoria, palabras in reglas['keywords_map'].items():
+        if not isinstance(palabras, list) or not all(isinstance(p, str) and p for p in palabras):
+            raise ValueError(f'{archivo}: {categoria!r} debe ser una lista de palabras')
+        keywords_map[categoria] = [p.lower() for p in palabras]
+    validas = {'keywords_map': keywords_map}
+    if 'precedencia' in reglas:
+        precedencia = reglas['precedencia']
+        if not isinstance(precedencia, list) or any(c not in keywords_map for c in precedencia):
+            raise ValueError(f'{archivo}: precedencia debe ser una lista de categorías de keywords_map')
+        validas['precedencia'] = precedencia
+    return validas
+
+
+def _ruta_compiladas(ruta, firma):
+    from motor.cache import _REGLAS, directorio_cache, version_codigo
+
+    directorio = directorio_cache()
+    if not directorio:
+        return None
+    h = hashlib.sha256(repr((os.path.abspath(ruta), firma)).encode())
+    h.update(version_codigo().encode())
+    return os.path.join(directorio, _REGLAS, h.hexdigest()[:32] + '.pkl')
+
+
+def _cargar_compiladas(ruta, firma):
+    # Reglas y expresión preparada de una corrida anterior (None si no hay)
+    import pickle
+
+    from motor.clasificacion import compilar_keywords
+
+    archivo = _ruta_compiladas(ruta, firma)
+    if not archivo or not os.path.exists(archivo):
+        return None
+    try:
+        with open(archivo, 'rb') as f:
+            reglas, preparadas = pickle.load(f)
+        os.utime(archivo)  # último uso (LRU)
+    except Exception:
+        return None
+    compilar_keywords(reglas['keywords_map'], preparadas)
+    return reglas
+
+
+def _guardar_compiladas(ruta, firma, reglas):
+    import pickle
+    import tempfile
+
+    from motor.cache import podar
+    from motor.clasificacion import compilar_keywords, preparar_keywords
+
+    preparadas = preparar_keywords(reglas['keywords_map'])
+    compilar_keywords(reglas['keywords_map'], preparadas)
+    archivo = _ruta_compiladas(ruta, firma)
+    if not archivo:
+        return
+    os.makedirs(os.path.dirname(archivo), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(archivo))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((reglas, preparadas), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, archivo)
+    except OSError:
+        return
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    podar()
+
+
+def cargar_reglas(nombre):
+    """Reglas externas del perfil (keywords_map y quizá precedencia), o None.
+
+    Se vuelven a leer solo si cambia la fecha o el tamaño del archivo.
+    """
+    ruta = ruta_reglas(nombre)
+    if ruta is None:
+        return None
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    previa = _cargadas.get(ruta)
+    if previa and previa[0] == firma:
+        return previa[1]
+    reglas = _cargar_compiladas(ruta, firma)
+    if reglas is None:
+        reglas = validar(leer_archivo(ruta), ruta)
+        _guardar_compiladas(ruta, firma, reglas)
+    _cargadas[ruta] = (firma, reglas)
+    return reglas
+
+
+def aplicar_reglas(perfil):
+    """Perfil con las reglas externas aplicadas (el mismo dict si no hay archivo)."""
+    reglas = cargar_reglas(perfil['nombre'])
+    if reglas is None:
+        return perfil
+    perfil = dict(perfil, keywords_map=reglas['keywords_map'])
+    if 'precedencia' in reglas:
+        perfil['clasificacion'] = dict(perfil['clasificacion'], precedencia=reglas['precedencia'])
+    return perfil
+
+
+def main(argv=None):
+    from motor.perfiles import PERFILES, obtener_perfil
+
+    parser = argparse.ArgumentParser(description='Muestra o exporta las reglas de clasificación de un perfil.')
+    parser.add_argument('empresa', choices=sorted(PERFILES))
+    parser.add_argument('--exportar', action='store_true',
+                        help='Escribe las reglas del perfil en reglas/<empresa>.json para editarlas ahí')
+    args = parser.parse_args(argv)
+
+    if args.exportar:
+        perfil = PERFILES[args.empresa]
+        ruta = os.path.join(directorio_reglas(), args.empresa + '.json')
+        if os.path.exists(ruta):
+            parser.error(f'{ruta} ya existe')
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        reglas = {'keywords_map': perfil['keywords_map']}
+        if 'precedencia' in perfil['clasificacion']:
+            reglas['precedencia'] = perfil['clasificacion']['precedencia']
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(reglas, f, indent=2, ensure_ascii=False)
+        print(f'Reglas escritas en {ruta}')
+        return 0
+
+    perfil = obtener_perfil(args.empresa)
+    print(f"Origen: {ruta_reglas(args.empresa) or 'motor/perfiles.py'}")
+    for categoria, palabras in perfil['keywords_map'].items():
+        print(f"  {categoria}: {', '.join(palabras)}")
+    if 'precedencia' in perfil['clasificacion']:
+        print(f"Precedencia: {', '.join(perfil['clasificacion']['precedencia'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
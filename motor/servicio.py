@@ -0,0 +1,355 @@
+# =============================
+# Servicio HTTP local con procesos precalentados
+# =============================
+# Uso:
+#   python -m motor.servicio --puerto 8765 --procesos 4
+#
+# Un solo servidor en localhost atiende a todos los contadores: los procesos
+# trabajadores arrancan una vez con pandas/openpyxl importados y las palabras
+# clave de cada perfil compiladas, así que cada archivo solo paga su propia
+# transformación.
+#
+#   POST /transformar/<empresa>[?formato=xlsx&cache=0]   cuerpo: el .xlsx de Odoo
+#        -> el archivo generado; el reporte por etapa va en la cabecera X-Reporte
+#   GET  /metricas   cola, procesos y latencia por trabajo (JSON)
+#   GET  /salud      200 si el servicio está arriba
+#
+# Las ventanas (main.py, RM/index.py, tcomunicamos/indext.py) envían el
+# archivo al servicio si está definida la variable de entorno
+#   TRANSFORMADOR_SERVICIO=http://127.0.0.1:8765
+# y lo transforman en su propio proceso si no está o el servicio no responde.
+import argparse
+import collections
+import functools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+VARIABLE_SERVICIO = 'TRANSFORMADOR_SERVICIO'
+PUERTO = 8765
+MAX_MB = 200
+
+# Bytes por lectura/escritura al recibir y devolver archivos
+_BLOQUE = 1 << 20
+
+# Latencias que se guardan para /metricas
+_ULTIMOS = 200
+
+# Segundos máximos que el cliente espera cada respuesta del servicio (conexión,
+# resultado de la transformación, cada bloque de la descarga); pasado ese
+# tiempo se transforma en el proceso local
+TIEMPO_ESPERA_S = 300
+
+
+# =============================
+# Procesos trabajadores
+# =============================
+def _calentar():
+    # Importa los módulos pesados y compila las palabras clave de cada perfil
+    from motor.arranque import MODULOS_PESADOS, importar_pesados
+    from motor.clasificacion import compilar_keywords
+    from motor.perfiles import PERFILES, obtener_perfil
+
+    importar_pesados(MODULOS_PESADOS + ['motor.transformador', 'motor.convertir'])
+    for nombre in PERFILES:
+        compilar_keywords(obtener_perfil(nombre)['keywords_map'])
+
+
+def _listo():
+    return os.getpid()
+
+
+def _trabajo(empresa, ruta_entrada, ruta_salida, formato, usar_cache):
+    from motor.convertir import convertir
+
+    inicio = time.time()
+    reporte = convertir(empresa, ruta_entrada, ruta_salida, formato, usar_cache)
+    return reporte, inicio, time.time()
+
+
+# =============================
+# Métricas
+# =============================
+class Metricas:
+    """Contadores del servicio y latencia de los últimos trabajos."""
+
+    def __init__(self, procesos):
+        self.procesos = procesos
+        self.inicio = time.time()
+        self.recibidos = 0
+        self.terminados = 0
+        self.errores = 0
+        self.pendientes = 0
+        self.ultimos = collections.deque(maxlen=_ULTIMOS)
+        self._candado = threading.Lock()
+
+    def recibido(self):
+        with self._candado:
+            self.recibidos += 1
+            self.pendientes += 1
+
+    def terminado(self, datos, error=False):
+        with self._candado:
+            self.pendientes -= 1
+            self.terminados += not error
+            self.errores += error
+            self.ultimos.append(datos)
+
+    def resumen(self):
+        with self._candado:
+            ultimos = list(self.ultimos)
+            resumen = {
+                'procesos': self.procesos,
+                'en_cola': max(0, self.pendientes - self.procesos),
+                'en_proceso': min(self.pendientes, self.procesos),
+                'recibidos': self.recibidos,
+                'terminados': self.terminados,
+                'errores': self.errores,
+                'activo_s': round(time.time() - self.inicio, 1),
+            }
+        for campo in ('espera_s', 'proceso_s', 'total_s'):
+            valores = sorted(d[campo] for d in ultimos if campo in d)
+            if valores:
+                resumen[campo] = {'p50': valores[len(valores) // 2],
+                                  'p95': valores[min(len(valores) - 1, int(len(valores) * 0.95))],
+                                  'max': valores[-1]}
+        resumen['ultimos'] = ultimos[-20:]
+        return resumen
+
+
+# =============================
+# Servidor
+# =============================
+def _reporte_corto(reporte):
+    # Sin la lista de líneas traslapadas: la cabecera debe ser corta
+    reporte = dict(reporte)
+    if 'traslapes' in reporte:
+        reporte['traslapes'] = {'total': reporte['traslapes'].get('total', 0)}
+    return json.dumps(reporte, default=str)
+
+
+def crear_servidor(host='127.0.0.1', puerto=PUERTO, procesos=None, max_mb=MAX_MB):
+    """Servidor HTTP listo para serve_forever(), con sus procesos ya arrancados."""
+    from concurrent.futures import ProcessPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from motor.convertir import FORMATOS
+    from motor.perfiles import PERFILES
+
+    procesos = procesos or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=procesos, initializer=_calentar)
+    # Un trabajo vacío por proceso: todos arrancan (y se calientan) antes de atender
+    for futuro in [pool.submit(_listo) for _ in range(procesos)]:
+        futuro.result()
+    metricas = Metricas(procesos)
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _json(self, codigo, datos):
+            cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            if codigo >= 400:
+                # El cuerpo de la petición puede no haberse leído
+                self.send_header('Connection', 'close')
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _leer_cuerpo(self, largo, destino=None):
+            # Lee el cuerpo por bloques y lo escribe en destino (o lo descarta)
+            while largo:
+                bloque = self.rfile.read(min(_BLOQUE, largo))
+                if not bloque:
+                    raise ConnectionError('el cliente cerró la conexión')
+                if destino:
+                    destino.write(bloque)
+                largo -= len(bloque)
+
+        def do_GET(self):
+            ruta = urllib.parse.urlsplit(self.path).path.rstrip('/')
+            if ruta == '/metricas':
+                self._json(200, metricas.resumen())
+            elif ruta == '/salud':
+                self._json(200, {'estado': 'ok', 'perfiles': sorted(PERFILES)})
+            else:
+                self._json(404, {'error': f'No existe {ruta}'})
+
+        def do_POST(self):
+            url = urllib.parse.urlsplit(self.path)
+            partes = url.path.strip('/').split('/')
+            if len(partes) != 2 or partes[0] != 'transformar':
+                return self._json(404, {'error': f'No existe {url.path}'})
+            empresa = urllib.parse.unquote(partes[1])
+            opciones = dict(urllib.parse.parse_qsl(url.query))
+            formato = opciones.get('formato', 'xlsx')
+            largo = int(self.headers.get('Content-Length') or 0)
+            if not 0 < largo <= max_mb * 1024 * 1024:
+                return self._json(413 if largo else 411, {'error': f'Envíe el .xlsx (máximo {max_mb} MB)'})
+            error = None
+            if empresa not in PERFILES:
+                error = f"Perfil desconocido: {empresa!r} (disponibles: {', '.join(sorted(PERFILES))})"
+            elif formato not in FORMATOS:
+                error = f'Formato desconocido: {formato!r}'
+            if error:
+                # Se lee el cuerpo para que el cliente reciba la respuesta y no un error de conexión
+                self._leer_cuerpo(largo)
+                return self._json(400, {'error': error})
+
+            recibido = time.time()
+            metricas.recibido()
+            datos = {'empresa': empresa, 'formato': formato, 'bytes': largo}
+            tmp = tempfile.mkdtemp(prefix='conversor_servicio_')
+            try:
+                entrada = os.path.join(tmp, 'entrada.xlsx')
+                salida = os.path.join(tmp, 'salida.' + formato)
+                with open(entrada, 'wb') as f:
+                    self._leer_cuerpo(largo, f)
+                try:
+                    reporte, inicio, fin = pool.submit(
+                        _trabajo, empresa, entrada, salida, formato, opciones.get('cache') != '0').result()
+                except Exception as e:
+                    datos['total_s'] = round(time.time() - recibido, 3)
+                    datos['error'] = f'{type(e).__name__}: {e}'
+                    metricas.terminado(datos, error=True)
+                    return self._json(400 if isinstance(e, (ValueError, KeyError)) else 500,
+                                      {'error': datos['error']})
+                datos.update(espera_s=round(inicio - recibido, 3), proceso_s=round(fin - inicio, 3))
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(os.path.getsize(salida)))
+                self.send_header('X-Reporte', _reporte_corto(reporte))
+                self.end_headers()
+                with open(salida, 'rb') as f:
+                    shutil.copyfileobj(f, self.wfile, _BLOQUE)
+                datos['total_s'] = round(time.time() - recibido, 3)
+                metricas.terminado(datos)
+            except ConnectionError as e:
+                datos['error'] = f'{type(e).__name__}: {e}'
+                metricas.terminado(datos, error=True)
+                self.close_connection = True
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.pool = pool
+    servidor.metricas = metricas
+    return servidor
+
+
+# =============================
+# Cliente para las ventanas
+# =============================
+def transformar_remoto(url, empresa, ruta_entrada, ruta_salida, guardar_reporte=False, progreso=None,
+                       usar_cache=True):
+    """Envía el archivo al servicio y guarda el resultado; devuelve el reporte por etapa."""
+    consulta = '' if usar_cache else '?cache=0'
+    direccion = f"{url.rstrip('/')}/transformar/{urllib.parse.quote(empresa)}{consulta}"
+    if progreso:
+        progreso('servicio')
+    with open(ruta_entrada, 'rb') as archivo:
+        peticion = urllib.request.Request(direccion, data=archivo, method='POST', headers={
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': str(os.path.getsize(ruta_entrada))})
+        try:
+            respuesta = urllib.request.urlopen(peticion, timeout=TIEMPO_ESPERA_S)
+        except urllib.error.HTTPError as e:
+            try:
+                mensaje = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError):
+                mensaje = f'HTTP {e.code}'
+            raise ValueError(mensaje) from None
+
+    if progreso:
+        progreso('descarga')
+    temporal = ruta_salida + '.parcial'
+    try:
+        with respuesta, open(temporal, 'wb') as f:
+            reporte = json.loads(respuesta.headers.get('X-Reporte') or '{}')
+            shutil.copyfileobj(respuesta, f, _BLOQUE)
+        os.replace(temporal, ruta_salida)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    reporte['entrada'] = os.path.abspath(ruta_entrada)
+    reporte['salida'] = os.path.abspath(ruta_salida)
+    reporte['servicio'] = url
+    if guardar_reporte:
+        ruta = os.path.splitext(ruta_salida)[0] + '_reporte.json'
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False, default=str)
+        reporte['ruta_reporte'] = ruta
+    return reporte
+
+
+def _remoto_o_local(url, empresa, local, ruta_entrada, ruta_salida, *args, **kwargs):
+    try:
+        return transformar_remoto(url, empresa, ruta_entrada, ruta_salida, *args, **kwargs)
+    except urllib.error.URLError as e:
+        if not isinstance(e.reason, OSError):
+            raise
+    except TimeoutError:
+        # Aceptó la conexión pero no contesta (socket.timeout es TimeoutError)
+        pass
+    # El servicio no responde: se transforma en este proceso
+    return local(ruta_entrada, ruta_salida, *args, **kwargs)
+
+
+def transformador(empresa, local=None):
+    """transformar(ruta_entrada, ruta_salida, ...) para las ventanas.
+
+    Usa el servicio de TRANSFORMADOR_SERVICIO si está definido y responde;
+    si no, local (por omisión transformar_excel con el perfil de la empresa).
+    """
+    from motor.perfiles import obtener_perfil
+
+    obtener_perfil(empresa)  # valida el nombre antes de encolar trabajo
+    if local is None:
+        from motor.transformador import transformar_excel
+        local = functools.partial(transformar_excel, empresa)
+    url = os.environ.get(VARIABLE_SERVICIO, '').strip()
+    if not url:
+        return local
+    return functools.partial(_remoto_o_local, url, empresa, local)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de transformación.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interfaz (por defecto solo localhost)')
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos trabajadores (por defecto, uno por núcleo)')
+    parser.add_argument('--max-mb', type=int, default=MAX_MB, help='Tamaño máximo de cada archivo recibido')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    servidor = crear_servidor(args.host, args.puerto, args.procesos, args.max_mb)
+    print(f'Servicio en http://{args.host}:{args.puerto} con {servidor.metricas.procesos} procesos '
+          f'(listo en {time.perf_counter() - inicio:.1f} s). Ctrl+C para detener.', flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.pool.shutdown(cancel_futures=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# =============================
+# Trabajador en segundo plano para las interfaces Tk
+# =============================
+# La transformación corre en un hilo aparte; la ventana lee los eventos con
+# root.after() para no congelarse ("No responde") mientras se procesa.
+import queue
+import threading
+
+
+class TransformacionCancelada(Exception):
+    """Se lanza dentro de la transformación cuando el usuario pide cancelar."""
+
+
+class Trabajador:
+    """Procesa en orden los archivos encolados y publica eventos en una cola.
+
+    Eventos (tuplas) que recibe la interfaz:
+        ('inicio', trabajo)
+        ('progreso', trabajo, etapa, hecho, total)
+        ('ok', trabajo, reporte)
+        ('error', trabajo, mensaje)
+        ('cancelado', trabajo)
+    donde trabajo es el par (ruta_entrada, ruta_salida).
+    """
+
+    def __init__(self, transformar=None):
+        self.transformar = transformar
+        self.eventos = queue.Queue()
+        self._trabajos = queue.Queue()
+        self._cancelar = threading.Event()
+        self._candado = threading.Lock()
+        self._numero = 0
+        self._actual = None        # (número, etiqueta) del archivo en curso
+        self._descartados = set()  # números encolados que ya no se procesan
+        self._hilo = threading.Thread(target=self._ciclo, daemon=True)
+        self._hilo.start()
+
+    def encolar(self, ruta_entrada, ruta_salida, transformar=None, etiqueta=None):
+        """Agrega un archivo a la cola; transformar reemplaza la función por omisión.
+
+        etiqueta identifica a quién pertenece el trabajo (la pestaña) para cancelar(etiqueta).
+        """
+        with self._candado:
+            self._numero += 1
+            self._trabajos.put((self._numero, etiqueta, ruta_entrada, ruta_salida,
+                                transformar or self.transformar))
+
+    def pendientes(self):
+        return self._trabajos.qsize()
+
+    def cancelar(self, etiqueta=None):
+        """Cancela el archivo en curso si es de etiqueta (con None, cualquiera).
+
+        Si el archivo en curso es de otra etiqueta, en su lugar se descartan
+        los encolados con etiqueta (cada uno publica 'cancelado' al llegar su
+        turno). Devuelve True si se canceló el archivo en curso.
+        """
+        with self._candado:
+            if self._actual is not None and (etiqueta is None or self._actual[1] == etiqueta):
+                self._cancelar.set()
+                return True
+            if etiqueta is not None:
+                with self._trabajos.mutex:
+                    self._descartados.update(t[0] for t in self._trabajos.queue if t[1] == etiqueta)
+            return False
+
+    def _ciclo(self):
+        while True:
+            numero, etiqueta, ruta_entrada, ruta_salida, transformar = self._trabajos.get()
+            trabajo = (ruta_entrada, ruta_salida)
+            with self._candado:
+                descartado = numero in self._descartados
+                self._descartados.discard(numero)
+                self._actual = None if descartado else (numero, etiqueta)
+                self._cancelar.clear()
+            if descartado:
+                self.eventos.put(('cancelado', trabajo))
+                self._trabajos.task_done()
+                continue
+            self.eventos.put(('inicio', trabajo))
+
+            def progreso(etapa, hecho=0, total=0):
+                if self._cancelar.is_set():
+                    raise TransformacionCancelada()
+                self.eventos.put(('progreso', trabajo, etapa, hecho, total))
+
+            try:
+                reporte = transformar(ruta_entrada, ruta_salida, progreso=progreso)
+                self.eventos.put(('ok', trabajo, reporte))
+            except TransformacionCancelada:
+                self.eventos.put(('cancelado', trabajo))
+            except Exception as e:
+                self.eventos.put(('error', trabajo, str(e)))
+            finally:
+                with self._candado:
+                    self._actual = None
+                self._trabajos.task_done()
+
+
+# Avance aproximado (%) al iniciar cada etapa; la exportación avanza por filas
+_AVANCE_ETAPAS = {
+    'cache': (0, 0, 'Buscando resultado previo'),
+    'bloques': (0, 42, 'Leyendo por bloques'),
+    'lectura': (0, 20, 'Leyendo archivo'),
+    'filtrado': (20, 25, 'Filtrando movimientos'),
+    'clasificacion': (25, 35, 'Clasificando líneas'),
+    'agrupacion': (35, 40, 'Agrupando asientos'),
+    'totales': (40, 42, 'Calculando totales'),
+    'exportacion': (42, 100, 'Escribiendo Excel'),
+    'servicio': (0, 90, 'Procesando en el servicio'),
+    'descarga': (90, 100, 'Descargando resultado'),
+}
+
+
+def describir_progreso(etapa, hecho=0, total=0):
+    """Devuelve (porcentaje, texto) para mostrar en la barra de progreso."""
+    inicio, fin, texto = _AVANCE_ETAPAS.get(etapa, (0, 100, etapa))
+    if total:
+        return inicio + (fin - inicio) * hecho / total, f'{texto}: fila {hecho:,} de {total:,}'
+    return inicio, f'{texto}...'
+
+
+def resumir_reporte(reporte):
+    """Texto corto para la interfaz al terminar una transformación."""
+    texto = f"Listo en {reporte['total_s']:.1f} s"
+    if reporte.get('etapas', {}).get('cache', {}).get('acierto'):
+        texto += " (resultado en caché)"
+    varias = reporte.get('traslapes', {}).get('total')
+    if varias:
+        texto += f" · {varias} líneas con varias categorías"
+    return texto
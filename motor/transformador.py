@@ -0,0 +1,156 @@
+# =============================
+# Transformador único configurado por perfiles
+# =============================
+# RM/index.py, tcomunicamos/indext.py y RM/pruebas.py llaman a esta función
+# con su perfil (ver motor/perfiles.py); lo que cambia entre empresas está
+# en el perfil y no en copias del código.
+import os
+
+from motor.medicion import Medicion, perfilar
+from motor.perfiles import obtener_perfil
+
+# Desde este tamaño de archivo se procesa por bloques (memoria acotada)
+UMBRAL_BLOQUES_MB = 40
+
+
+def transformar_excel(perfil, ruta_entrada, ruta_salida, guardar_reporte=False, progreso=None, usar_cache=True,
+                      por_bloques=None, incremental=False, motor=None):
+    """Genera el Excel estilizado con el perfil indicado y devuelve el reporte por etapa.
+
+    perfil es el nombre de un perfil de PERFILES o un dict con la misma forma.
+    Con guardar_reporte=True el reporte se escribe como JSON junto a la salida.
+    progreso(etapa, hecho, total) se llama al iniciar cada etapa y durante la
+    escritura; si lanza una excepción la transformación se interrumpe.
+    Con usar_cache=True un archivo ya transformado con las mismas reglas se
+    copia de la caché (ver motor/cache.py) sin volver a procesarlo, y uno ya
+    leído con otras reglas se toma de su instantánea en lugar del .xlsx.
+    por_bloques=True lee y escribe por bloques (motor/bloques.py); con None se
+    decide por el tamaño del archivo (UMBRAL_BLOQUES_MB).
+    incremental=True solo vuelve a clasificar los asientos nuevos o cambiados
+    desde la corrida anterior hacia la misma salida (motor/incremental.py);
+    requiere la caché y no aplica por bloques.
+    motor elige el motor de lectura (ver lectura.MOTORES) en lugar del del
+    perfil o el más rápido disponible.
+    """
+    # pandas/openpyxl se importan aquí y no al abrir la ventana
+    from motor.cache import clave_resultado, directorio_cache, guardar_resultado, restaurar_salida
+    from motor.exportar import exportar_excel
+
+    perfil = obtener_perfil(perfil)
+    if motor:
+        perfil = dict(perfil, lectura=dict(perfil.get('lectura', {}), motor=motor))
+    keywords_map = perfil['keywords_map']
+    if por_bloques is None:
+        por_bloques = os.path.getsize(ruta_entrada) > UMBRAL_BLOQUES_MB * 1024 * 1024
+    # Por bloques las etapas se repiten en cada bloque; el avance lo reporta bloques.py
+    medicion = Medicion(perfil['nombre'], ruta_entrada, ruta_salida, None if por_bloques else progreso)
+    medicion.reporte['por_bloques'] = por_bloques
+    medicion.reporte['incremental'] = bool(incremental and not por_bloques)
+
+    # Resultado previo del mismo archivo con el mismo perfil
+    clave = None
+    if usar_cache and directorio_cache():
+        with medicion.etapa('cache') as etapa:
+            clave, entrada_sha256 = clave_resultado(ruta_entrada, perfil, por_bloques)
+            etapa['acierto'] = restaurar_salida(clave, ruta_salida)
+        if etapa['acierto']:
+            return medicion.finalizar(guardar_reporte)
+
+    if por_bloques:
+        from motor.bloques import transformar_por_bloques
+
+        with perfilar(ruta_salida):
+            medicion.reporte['traslapes'] = transformar_por_bloques(
+                perfil, ruta_entrada, ruta_salida, medicion, progreso)
+        if clave:
+            guardar_resultado(clave, ruta_salida, None, transformador=perfil['nombre'],
+                              entrada=os.path.abspath(ruta_entrada), entrada_sha256=entrada_sha256)
+        return medicion.finalizar(guardar_reporte)
+
+    with perfilar(ruta_salida):
+        if incremental and clave:
+            from motor.incremental import agrupar_incremental
+
+            df_grouped = agrupar_incremental(perfil, ruta_entrada, ruta_salida, medicion, entrada_sha256)
+        else:
+            df_grouped = agrupar_estado(perfil, ruta_entrada, medicion, entrada_sha256 if clave else None)
+
+        # Exportar con estilos en una sola escritura (sin releer el archivo)
+        with medicion.etapa('exportacion') as etapa:
+            etapa['celdas_estilizadas'] = exportar_excel(
+                df_grouped, ruta_salida, keywords_map, progreso=progreso, **perfil['exportacion'])
+            etapa['filas'] = len(df_grouped)
+
+    if clave:
+        guardar_resultado(clave, ruta_salida, df_grouped, transformador=perfil['nombre'],
+                          entrada=os.path.abspath(ruta_entrada), entrada_sha256=entrada_sha256)
+
+    return medicion.finalizar(guardar_reporte)
+
+
+def agrupar_estado(perfil, ruta_entrada, medicion, entrada_sha256=None):
+    """Lectura, filtrado, clasificación, agrupación y totales de un estado de cuenta.
+
+    Devuelve el DataFrame agrupado con la fila TOTAL, listo para exportar; las
+    etapas se anotan en medicion. Con entrada_sha256 la lectura usa (o guarda)
+    la instantánea del archivo en la caché.
+    """
+    from motor.clasificacion import agregar_totales
+
+    perfil = obtener_perfil(perfil)
+    df = leer_movimientos(perfil, ruta_entrada, medicion, entrada_sha256)
+    df_grouped = clasificar_y_agrupar(perfil, df, medicion)
+
+    # Numeración y fila TOTAL
+    with medicion.etapa('totales'):
+        df_grouped = agregar_totales(df_grouped, **perfil['totales'])
+    return df_grouped
+
+
+def leer_movimientos(perfil, ruta_entrada, medicion, entrada_sha256=None):
+    """Etapas de lectura y filtrado: movimientos listos para clasificar."""
+    from motor.cache import cargar_lectura, guardar_lectura
+    from motor.lectura import agregar_auxiliares, leer_estado_cuenta, motor_lectura, preparar_movimientos
+
+    # Leer datos (instantánea de una corrida anterior o solo las columnas
+    # necesarias del .xlsx, con el motor del perfil o el más rápido disponible;
+    # desde UMBRAL_BLOQUES_MB con openpyxl por bloques, con memoria acotada)
+    with medicion.etapa('lectura') as etapa:
+        df = cargar_lectura(entrada_sha256) if entrada_sha256 else None
+        etapa['instantanea'] = df is not None
+        if df is None:
+            opciones = dict(perfil.get('lectura', {}))
+            if not opciones.get('motor') and os.path.getsize(ruta_entrada) > UMBRAL_BLOQUES_MB * 1024 * 1024:
+                opciones['motor'] = 'openpyxl'
+            etapa['motor'] = motor_lectura(opciones.get('motor'))
+            df = agregar_auxiliares(leer_estado_cuenta(ruta_entrada, **opciones))
+            if entrada_sha256:
+                guardar_lectura(entrada_sha256, df)
+        etapa['filas'] = len(df)
+
+    # Filtrar negativos, propagar Asiento/Fecha y auxiliares en minúsculas
+    with medicion.etapa('filtrado') as etapa:
+        df = preparar_movimientos(df, **perfil['movimientos'])
+        etapa['filas'] = len(df)
+    return df
+
+
+def clasificar_y_agrupar(perfil, df, medicion):
+    """Etapas de clasificación y agrupación: una fila por asiento (sin TOTAL)."""
+    from motor.clasificacion import agrupar_asientos, clasificar_lineas, reporte_traslapes
+
+    keywords_map = perfil['keywords_map']
+
+    # Clasificación en una sola pasada, una categoría por línea según precedencia
+    with medicion.etapa('clasificacion') as etapa:
+        mascaras, todas = clasificar_lineas(df, keywords_map, **perfil['clasificacion'])
+        traslapes = reporte_traslapes(df, todas, mascaras, keywords_map)
+        etapa['filas_clasificadas'] = int(mascaras.any(axis=1).sum())
+        etapa['filas_varias_categorias'] = traslapes['total']
+        medicion.reporte['traslapes'] = traslapes
+
+    # Agrupar por asiento y obtener DF final
+    with medicion.etapa('agrupacion') as etapa:
+        df_grouped = agrupar_asientos(df, keywords_map, mascaras=mascaras, **perfil['agrupacion'])
+        etapa['asientos'] = len(df_grouped)
+    return df_grouped
@@ -0,0 +1,40 @@
+# =============================
+# Configuración común de las pruebas
+# =============================
+import os
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.generar import generar_estado  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def entorno(tmp_path, monkeypatch):
+    # Caché y reglas en carpetas propias de cada prueba; nunca el servicio
+    monkeypatch.setenv('TRANSFORMADOR_CACHE', str(tmp_path / 'cache'))
+    monkeypatch.setenv('TRANSFORMADOR_REGLAS', str(tmp_path / 'reglas'))
+    monkeypatch.delenv('TRANSFORMADOR_SERVICIO', raising=False)
+
+
+@pytest.fixture
+def estado(tmp_path):
+    """Genera un export sintético de Odoo: estado(empresa, filas=600, semilla=0) -> ruta."""
+    def crear(empresa='rm', filas=600, semilla=0, nombre=None):
+        ruta = tmp_path / (nombre or f'{empresa}_{filas}_{semilla}.xlsx')
+        return generar_estado(str(ruta), filas, empresa, semilla=semilla)
+    return crear
+
+
+def celdas(ruta):
+    """Valor y color de letra de cada celda de la primera hoja."""
+    wb = load_workbook(ruta)
+    try:
+        return [[(c.value, c.font.color.rgb if c.font.color else None) for c in fila]
+                for fila in wb.active.iter_rows()]
+    finally:
+        wb.close()
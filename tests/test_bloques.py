@@ -0,0 +1,87 @@
+# =============================
+# Transformación por bloques contra la transformación en memoria
+# =============================
+import pandas as pd
+import pytest
+from conftest import celdas
+from openpyxl import load_workbook
+
+from motor.bloques import transformar_por_bloques
+from motor.lectura import leer_estado_cuenta
+from motor.medicion import Medicion
+from motor.perfiles import obtener_perfil
+from motor.transformador import transformar_excel
+
+FILAS_BLOQUE = 7
+
+
+def asientos_partidos(ruta, filas_bloque):
+    """Cuántos cortes de bloque caen dentro de un asiento."""
+    asientos = pd.read_excel(ruta)['Asiento contable'].ffill()
+    cortes = range(filas_bloque, len(asientos), filas_bloque)
+    return sum(asientos.iat[i - 1] == asientos.iat[i] for i in cortes)
+
+
+def por_bloques(empresa, entrada, salida, filas_bloque=FILAS_BLOQUE):
+    perfil = obtener_perfil(empresa)
+    medicion = Medicion(perfil['nombre'], entrada, salida)
+    transformar_por_bloques(perfil, entrada, salida, medicion, filas_bloque=filas_bloque)
+    return medicion
+
+
+@pytest.mark.parametrize('empresa', ['rm', 'tcomunicamos', 'pruebas'])
+def test_por_bloques_igual_a_memoria(empresa, estado, tmp_path):
+    generador = 'tcomunicamos' if empresa == 'tcomunicamos' else 'rm'
+    entrada = estado(generador, filas=400)
+    assert asientos_partidos(entrada, FILAS_BLOQUE) > 0
+
+    completo, bloques = tmp_path / 'completo.xlsx', tmp_path / 'bloques.xlsx'
+    transformar_excel(empresa, entrada, completo, usar_cache=False, por_bloques=False)
+    por_bloques(empresa, entrada, bloques)
+    assert celdas(bloques) == celdas(completo)
+
+
+def test_por_bloques_archivo_sin_movimientos(tmp_path):
+    from openpyxl import Workbook
+
+    from benchmarks.generar import COLUMNAS
+
+    entrada = tmp_path / 'vacio.xlsx'
+    wb = Workbook()
+    wb.active.append(COLUMNAS)
+    wb.save(entrada)
+    with pytest.raises(ValueError):
+        por_bloques('rm', entrada, tmp_path / 'salida.xlsx')
+
+
+def test_asiento_repetido_en_bloques_no_contiguos(estado, tmp_path):
+    # El mismo asiento vuelve a aparecer al final del export: en memoria se
+    # agrupa en una sola fila y por bloques debe dar la misma numeración y TOTAL
+    entrada = estado('rm', filas=200)
+    wb = load_workbook(entrada)
+    ws = wb.active
+    filas = [[c.value for c in fila] for fila in ws.iter_rows(min_row=2)]
+    inicio = next(i for i, f in enumerate(filas) if f[0] is not None and i > 20)
+    fin = next(i for i in range(inicio + 1, len(filas)) if filas[i][0] is not None)
+    for fila in filas[inicio:fin]:
+        ws.append(fila)
+    wb.save(entrada)
+
+    completo, bloques = tmp_path / 'completo.xlsx', tmp_path / 'bloques.xlsx'
+    transformar_excel('rm', entrada, completo, usar_cache=False, por_bloques=False)
+    medicion = por_bloques('rm', entrada, bloques, filas_bloque=5)
+    esperado = celdas(completo)
+    assert celdas(bloques) == esperado
+    assert medicion.reporte['etapas']['exportacion']['filas'] == len(esperado) - 1
+    anchos = [load_workbook(r).active.column_dimensions['A'].width for r in (completo, bloques)]
+    assert anchos[0] == anchos[1]
+
+
+def test_lectura_por_bloques_igual_con_cualquier_tamano(estado):
+    # Las categorías se arman bloque a bloque: mismo DataFrame que en un solo bloque
+    entrada = estado('tcomunicamos', filas=400)
+    completo = leer_estado_cuenta(entrada, filas_bloque=10_000)
+    pd.testing.assert_frame_equal(leer_estado_cuenta(entrada, filas_bloque=FILAS_BLOQUE), completo)
+    assert isinstance(completo['Asiento contable'].dtype, pd.CategoricalDtype)
+    asientos = completo['Asiento contable']
+    assert list(asientos.cat.categories) == sorted(asientos.dropna().unique())
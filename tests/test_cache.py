@@ -0,0 +1,60 @@
+# =============================
+# Caché en disco: límite de tamaño y temporales
+# =============================
+import json
+import os
+
+import pandas as pd
+
+from motor import cache
+
+
+def test_podar_cubre_instantaneas_estados_y_reglas(estado, tmp_path, monkeypatch):
+    from motor.transformador import transformar_excel
+
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    os.makedirs(carpeta)
+    with open(os.path.join(carpeta, 'rm.json'), 'w', encoding='utf-8') as f:
+        json.dump({'keywords_map': {'Facta': ['facta']}}, f)
+    for semilla in range(3):
+        entrada = estado('rm', filas=300, semilla=semilla)
+        transformar_excel('rm', entrada, tmp_path / f'salida_{semilla}.xlsx', incremental=True)
+    directorio = cache.directorio_cache()
+    for subcarpeta in cache._SUBCARPETAS + ('',):
+        assert os.listdir(os.path.join(directorio, subcarpeta))
+
+    # Un límite mínimo deja solo lo usado más recientemente
+    monkeypatch.setenv(cache.VARIABLE_LIMITE, '0.000001')
+    assert cache.podar() > 0
+    restantes = [a for s in cache._SUBCARPETAS for a in cache._listar_archivos(s)] + cache.listar()
+    assert len(restantes) <= 1
+
+
+def test_guardar_estado_sin_temporales_si_falla_el_pickle():
+    import threading
+
+    try:
+        cache.guardar_estado('clave', {'candado': threading.Lock()})
+    except TypeError:
+        pass
+    carpeta = os.path.join(cache.directorio_cache(), cache._INCREMENTAL)
+    assert os.listdir(carpeta) == []
+    try:
+        cache.guardar_lectura('0' * 64, pd.DataFrame({'a': [threading.Lock()]}))
+    except TypeError:
+        pass
+    assert os.listdir(os.path.join(cache.directorio_cache(), cache._LECTURAS)) == []
+
+
+def test_limpiar_borra_todas_las_subcarpetas(estado, tmp_path):
+    from motor.transformador import transformar_excel
+
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    os.makedirs(carpeta)
+    with open(os.path.join(carpeta, 'rm.json'), 'w', encoding='utf-8') as f:
+        json.dump({'keywords_map': {'Facta': ['facta']}}, f)
+    transformar_excel('rm', estado('rm', filas=300), tmp_path / 'salida.xlsx', incremental=True)
+    assert cache.main(['--limpiar']) == 0
+    for subcarpeta in cache._SUBCARPETAS:
+        assert not cache._listar_archivos(subcarpeta), subcarpeta
+    assert not cache.listar()
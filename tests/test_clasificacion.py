@@ -0,0 +1,133 @@
+# =============================
+# Clasificación por palabras clave y montos en centavos
+# =============================
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from motor.clasificacion import agregar_totales, agrupar_asientos, clasificar_lineas, mascaras_categorias
+from motor.lectura import agregar_auxiliares, preparar_movimientos
+from motor.perfiles import CREDITO, DEBITO, PERFILES
+
+FECHA = datetime.datetime(2025, 3, 1)
+
+
+def movimientos(asientos):
+    """Movimientos listos para clasificar a partir de {asiento: (importe, [(línea, débito, crédito)])}.
+
+    Cada asiento es una fila de banco seguida de sus líneas de detalle, como
+    en el export de Odoo.
+    """
+    filas = []
+    for asiento, (importe, lineas) in asientos.items():
+        filas.append({'Asiento contable': asiento, 'Fecha': FECHA, 'Importe': importe,
+                      'Partner': None, 'Referencia': np.nan, 'Líneas de factura': f'{asiento} banco',
+                      DEBITO: 0.0, CREDITO: 0.0})
+        for linea, debito, credito in lineas:
+            filas.append({'Asiento contable': None, 'Fecha': pd.NaT, 'Importe': np.nan,
+                          'Partner': None, 'Referencia': np.nan, 'Líneas de factura': linea,
+                          DEBITO: debito, CREDITO: credito})
+    return preparar_movimientos(agregar_auxiliares(pd.DataFrame(filas)))
+
+
+def lineas(textos, partners=None):
+    df = pd.DataFrame({'Líneas de factura': textos, 'Partner': partners or [None] * len(textos)})
+    return agregar_auxiliares(df)
+
+
+# =============================
+# Palabras clave y precedencia
+# =============================
+def test_palabra_clave_en_linea_o_partner_sin_importar_mayusculas():
+    keywords_map = {'Facta': ['facta'], 'Master': ['max']}
+    df = lineas(['BBVA1 FACTA/12', 'cliente varios', None], [None, 'MAXIMO PEREZ', None])
+    mascaras = mascaras_categorias(df, keywords_map)
+    assert mascaras.tolist() == [[True, False], [False, True], [False, False]]
+
+
+def test_palabra_clave_prefijo_de_otra_cuenta_para_ambas_categorias():
+    # 'alm' y 'almacen' empiezan en la misma posición: cuenta para las dos
+    keywords_map = {'Corta': ['alm'], 'Larga': ['almacen'], 'Otra': ['sat']}
+    mascaras = mascaras_categorias(lineas(['pago almacen norte', 'alm/3', 'satelite']), keywords_map)
+    assert mascaras.tolist() == [[True, True, False], [True, False, False], [False, False, True]]
+
+
+def test_precedencia_deja_una_sola_categoria_por_linea():
+    perfil = PERFILES['rm']
+    df = lineas(['TRASPASO FACTA/1', 'FACTA MAX', 'comision'])
+    mascaras, todas = clasificar_lineas(df, perfil['keywords_map'], **perfil['clasificacion'])
+    categorias = list(perfil['keywords_map'])
+
+    def nombres(fila):
+        return [categorias[i] for i in np.flatnonzero(fila)]
+
+    assert [nombres(f) for f in todas] == [['Facta', 'Traspaso'], ['Facta', 'Master'], ['Comision']]
+    assert [nombres(f) for f in mascaras] == [['Traspaso'], ['Facta'], ['Comision']]
+
+
+def test_precedencia_respeta_el_orden_indicado():
+    keywords_map = {'A': ['uno'], 'B': ['dos']}
+    df = lineas(['uno dos'])
+    mascaras, _ = clasificar_lineas(df, keywords_map, exclusiva=True, precedencia=['B'])
+    assert mascaras.tolist() == [[False, True]]
+    mascaras, _ = clasificar_lineas(df, keywords_map, exclusiva=True)
+    assert mascaras.tolist() == [[True, False]]
+
+
+def test_sin_exclusiva_la_linea_suma_en_todas_sus_categorias():
+    keywords_map = {'Facta': ['facta'], 'Traspaso': ['traspaso']}
+    df = movimientos({'A/1': (10.0, [('traspaso facta', 0.0, 10.0)])})
+    mascaras, _ = clasificar_lineas(df, keywords_map)
+    res = agrupar_asientos(df, keywords_map, mascaras=mascaras)
+    assert res[['Facta', 'Traspaso', 'Redond']].iloc[0].tolist() == [10.0, 10.0, -10.0]
+
+
+# =============================
+# Montos en centavos
+# =============================
+def test_asiento_cuadrado_da_redond_cero_exacto():
+    # 0.1 + 0.2 != 0.3 en punto flotante; en centavos el residuo es 0
+    keywords_map = {'Facta': ['facta'], 'Master': ['max']}
+    df = movimientos({'A/1': (0.3, [('facta 1', 0.0, 0.1), ('max 2', 0.0, 0.2)])})
+    res = agrupar_asientos(df, keywords_map)
+    fila = res.iloc[0]
+    assert (fila['Abono'], fila['Facta'], fila['Master']) == (0.3, 0.1, 0.2)
+    assert fila['Redond'] == 0 and fila['Saldo'] == 0
+
+
+def test_residuo_no_clasificado_va_a_redond():
+    keywords_map = {'Facta': ['facta']}
+    df = movimientos({
+        'A/1': (100.01, [('facta 1', 0.0, 100.0), ('cliente varios', 0.0, 0.01)]),
+        'A/2': (5.5, [('facta 2', 0.0, 5.75)]),
+    })
+    res = agrupar_asientos(df, keywords_map)
+    assert res['Redond'].tolist() == [0.01, -0.25]
+    assert res['Saldo'].tolist() == [0, 0]
+
+
+def test_decimales_redond_reparte_entre_redond_y_saldo():
+    keywords_map = {'Facta': ['facta']}
+    df = movimientos({'A/1': (101.37, [('facta 1', 0.0, 100.0)])})
+    res = agrupar_asientos(df, keywords_map, decimales_redond=0)
+    assert (res['Redond'].iat[0], res['Saldo'].iat[0]) == (1.0, 0.37)
+
+
+def test_asientos_en_orden_y_datos_de_la_primera_fila():
+    keywords_map = {'Facta': ['facta']}
+    df = movimientos({'A/2': (2.0, [('facta b', 0.0, 2.0)]), 'A/1': (1.0, [('facta a', 0.0, 1.0)])})
+    res = agrupar_asientos(df, keywords_map, columna_asiento=True)
+    assert res['Asiento contable'].tolist() == ['A/1', 'A/2']
+    assert res['Concepto / Referencia'].tolist() == ['A/1 banco', 'A/2 banco']
+    assert res['Día'].tolist() == [FECHA.date()] * 2
+
+
+def test_fila_total_suma_en_centavos():
+    df = pd.DataFrame({'Concepto / Referencia': ['x'] * 10, 'Abono': [0.1] * 10, 'Redond': [0.0] * 10})
+    assert sum(df['Abono']) != 1.0  # 0.9999999999999999 sumando floats
+    res = agregar_totales(df)
+    total = res.iloc[-1]
+    assert total['Concepto / Referencia'] == 'TOTAL'
+    assert total['#'] == sum(range(1, 11))
+    assert total['Abono'] == 1.0 and total['Redond'] == 0
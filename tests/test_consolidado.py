@@ -0,0 +1,34 @@
+# =============================
+# Libro consolidado con un banco que no se puede leer
+# =============================
+from openpyxl import Workbook, load_workbook
+
+from motor.consolidado import HOJA_RESUMEN, main
+
+
+def test_banco_con_error_se_omite_y_se_reporta(estado, tmp_path, capsys):
+    bueno = estado('rm', filas=200, nombre='bbva.xlsx')
+    malo = tmp_path / 'banamex.xlsx'
+    wb = Workbook()
+    wb.active.append(['Fecha', 'Descripción', 'Cargo'])
+    wb.save(malo)
+
+    salida = tmp_path / 'consolidado.xlsx'
+    assert main(['rm', str(salida), bueno, str(malo), '--procesos', '2', '--sin-cache']) == 1
+    salida_texto = capsys.readouterr().out
+    assert '✅ bbva.xlsx' in salida_texto
+    assert '❌ banamex.xlsx ValueError: El archivo no parece un estado de cuenta de Odoo' in salida_texto
+    libro = load_workbook(salida, read_only=True)
+    assert libro.sheetnames == [HOJA_RESUMEN, 'bbva']
+    libro.close()
+
+
+def test_sin_bancos_legibles_no_escribe_libro(tmp_path, capsys):
+    malo = tmp_path / 'banamex.xlsx'
+    wb = Workbook()
+    wb.active.append(['Fecha'])
+    wb.save(malo)
+    salida = tmp_path / 'consolidado.xlsx'
+    assert main(['rm', str(salida), str(malo), '--sin-cache']) == 1
+    assert 'Ningún estado de cuenta se pudo consolidar' in capsys.readouterr().err
+    assert not salida.exists()
@@ -0,0 +1,44 @@
+# =============================
+# Modo incremental contra una corrida completa
+# =============================
+from conftest import celdas
+from openpyxl import load_workbook
+
+from motor.transformador import transformar_excel
+
+
+def variante(origen, destino, conservar=1.0, linea_nueva=None):
+    """Copia del export con solo la fracción conservar de filas y, si se indica, una línea cambiada."""
+    wb = load_workbook(origen)
+    ws = wb.active
+    n = ws.max_row
+    if conservar < 1:
+        ws.delete_rows(int(n * conservar), n)
+    if linea_nueva:
+        columna = [c.value for c in ws[1]].index('Líneas de factura') + 1
+        ws.cell(row=ws.max_row // 3, column=columna).value = linea_nueva
+    wb.save(destino)
+    return destino
+
+
+def test_incremental_igual_a_corrida_completa(estado, tmp_path):
+    origen = estado('rm', filas=500)
+    # El export del mes crece; entre corridas también cambia una línea ya vista
+    entradas = [
+        variante(origen, tmp_path / 'dia1.xlsx', conservar=0.5),
+        variante(origen, tmp_path / 'dia2.xlsx', conservar=0.8, linea_nueva='traspaso facta corregido'),
+        variante(origen, tmp_path / 'dia3.xlsx'),
+        variante(origen, tmp_path / 'dia4.xlsx', conservar=0.6),
+    ]
+    salida, completa = tmp_path / 'mes.xlsx', tmp_path / 'completa.xlsx'
+    etapas = []
+    for entrada in entradas:
+        reporte = transformar_excel('rm', entrada, salida, incremental=True)
+        transformar_excel('rm', entrada, completa, usar_cache=False)
+        assert celdas(salida) == celdas(completa)
+        etapas.append(reporte['etapas']['incremental'])
+
+    assert etapas[0]['reutilizados'] == 0
+    # Cambiados: la línea editada y el asiento que el día 1 quedó cortado
+    assert etapas[1]['reutilizados'] > 0 and etapas[1]['nuevos'] > 0 and etapas[1]['cambiados'] == 2
+    assert etapas[3]['borrados'] > 0
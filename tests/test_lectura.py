@@ -0,0 +1,56 @@
+# =============================
+# Lectura del export: motores y elección del motor
+# =============================
+import pytest
+from conftest import celdas
+
+from motor import lectura
+from motor.transformador import transformar_excel
+
+
+def test_sin_calamine_se_usa_openpyxl(monkeypatch):
+    monkeypatch.setattr(lectura, 'MOTORES', [('calamine', lambda: False), ('openpyxl', lambda: True)])
+    assert lectura.motor_lectura() == 'openpyxl'
+    assert lectura.motor_lectura('calamine') == 'calamine'
+
+
+def test_motor_indicado_llega_a_la_lectura(estado, tmp_path, monkeypatch):
+    entrada = estado('rm', filas=200)
+    usados = []
+    leer = lectura.leer_estado_cuenta
+
+    def espia(ruta, motor=None, **opciones):
+        usados.append(motor)
+        return leer(ruta, motor=motor, **opciones)
+
+    monkeypatch.setattr(lectura, 'leer_estado_cuenta', espia)
+    transformar_excel('rm', entrada, tmp_path / 'openpyxl.xlsx', usar_cache=False, por_bloques=False,
+                      motor='openpyxl')
+    assert usados == ['openpyxl']
+
+
+@pytest.mark.skipif(not lectura._calamine_disponible(), reason='requiere python-calamine')
+def test_mismo_resultado_con_calamine_y_openpyxl(estado, tmp_path):
+    entrada = estado('tcomunicamos', filas=300)
+    for motor in ('calamine', 'openpyxl'):
+        transformar_excel('tcomunicamos', entrada, tmp_path / f'{motor}.xlsx', usar_cache=False,
+                          por_bloques=False, motor=motor)
+    assert celdas(tmp_path / 'calamine.xlsx') == celdas(tmp_path / 'openpyxl.xlsx')
+
+
+@pytest.mark.skipif(not lectura._calamine_disponible(), reason='requiere python-calamine')
+def test_calamine_es_el_motor_por_defecto():
+    assert lectura.motor_lectura() == 'calamine'
+
+
+def test_archivo_grande_se_lee_por_bloques(estado, tmp_path, monkeypatch):
+    from motor import transformador
+
+    entrada = estado('rm', filas=200)
+    reporte = transformar_excel('rm', entrada, tmp_path / 'normal.xlsx', usar_cache=False, por_bloques=False)
+    assert reporte['etapas']['lectura']['motor'] == lectura.motor_lectura()
+
+    monkeypatch.setattr(transformador, 'UMBRAL_BLOQUES_MB', 0)
+    reporte = transformar_excel('rm', entrada, tmp_path / 'grande.xlsx', usar_cache=False, por_bloques=False)
+    assert reporte['etapas']['lectura']['motor'] == 'openpyxl'
+    assert celdas(tmp_path / 'grande.xlsx') == celdas(tmp_path / 'normal.xlsx')
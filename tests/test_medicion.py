@@ -0,0 +1,22 @@
+# =============================
+# Medición por etapas
+# =============================
+import time
+
+import pytest
+
+from motor.medicion import Medicion, memoria_actual_mb
+
+
+@pytest.mark.skipif(memoria_actual_mb() is None, reason='no se puede medir la memoria residente')
+def test_pico_de_cada_etapa_no_arrastra_el_de_etapas_anteriores(tmp_path):
+    medicion = Medicion('prueba', tmp_path / 'entrada.xlsx', tmp_path / 'salida.xlsx')
+    with medicion.etapa('pesada'):
+        bloque = b'\x01' * (200 * 1024 * 1024)
+        time.sleep(0.05)
+        del bloque
+    with medicion.etapa('ligera'):
+        time.sleep(0.05)
+    etapas = medicion.finalizar()['etapas']
+    assert etapas['ligera']['pico_rss_mb'] < etapas['pesada']['pico_rss_mb'] - 100
+    assert medicion.reporte['pico_rss_mb'] == etapas['pesada']['pico_rss_mb']
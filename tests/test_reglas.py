@@ -0,0 +1,102 @@
+# =============================
+# Reglas de clasificación en archivos externos
+# =============================
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+from openpyxl import load_workbook
+
+from motor import reglas
+from motor.perfiles import PERFILES, obtener_perfil
+from motor.transformador import transformar_excel
+
+
+def escribir_reglas(carpeta, nombre, contenido):
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, nombre)
+    anterior = os.stat(ruta).st_mtime_ns if os.path.exists(ruta) else 0
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f)
+    # La fecha siempre avanza, aunque el sistema de archivos tenga poca resolución
+    os.utime(ruta, ns=(anterior + 10**9, anterior + 10**9))
+    return ruta
+
+
+def test_sin_archivo_se_usa_el_perfil():
+    assert obtener_perfil('rm') is PERFILES['rm']
+
+
+def test_reglas_se_recargan_al_cambiar_el_archivo(tmp_path):
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Facta': ['FACTA'], 'Master': ['max']}})
+    perfil = obtener_perfil('rm')
+    assert perfil['keywords_map'] == {'Facta': ['facta'], 'Master': ['max']}
+    assert perfil['clasificacion']['precedencia'] == PERFILES['rm']['clasificacion']['precedencia']
+
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Traspaso': ['traspaso'], 'Facta': ['facta']},
+                                         'precedencia': ['Facta']})
+    perfil = obtener_perfil('rm')
+    assert list(perfil['keywords_map']) == ['Traspaso', 'Facta']
+    assert perfil['clasificacion']['precedencia'] == ['Facta']
+
+
+def test_transformacion_usa_las_reglas_vigentes(estado, tmp_path):
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    entrada, salida = estado('rm', filas=200), tmp_path / 'salida.xlsx'
+
+    def cabecera():
+        transformar_excel('rm', entrada, salida)
+        wb = load_workbook(salida, read_only=True)
+        try:
+            return [c.value for c in next(wb.active.iter_rows(max_row=1))]
+        finally:
+            wb.close()
+
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Facta': ['facta']}})
+    assert cabecera()[6:] == ['Facta', 'Redond', 'Saldo']
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Facta': ['facta'], 'SAT': ['sat']}})
+    assert cabecera()[6:] == ['Facta', 'SAT', 'Redond', 'Saldo']
+
+
+def test_reglas_invalidas_se_rechazan():
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Facta': ['facta']}, 'precedencia': ['SAT']})
+    with pytest.raises(ValueError, match='precedencia'):
+        reglas.cargar_reglas('rm')
+
+
+def test_reglas_preparadas_en_disco_no_se_vuelven_a_armar(monkeypatch):
+    from motor import clasificacion
+
+    carpeta = os.environ['TRANSFORMADOR_REGLAS']
+    escribir_reglas(carpeta, 'rm.json', {'keywords_map': {'Facta': ['facta'], 'SAT': ['sat']}})
+    patron, tabla = clasificacion.compilar_keywords(reglas.cargar_reglas('rm')['keywords_map'])
+
+    # Otro proceso: sin reglas leídas ni compiladas en memoria
+    monkeypatch.setattr(reglas, '_cargadas', {})
+    monkeypatch.setattr(clasificacion, '_compiladas', OrderedDict())
+
+    def no_usar(*args):
+        raise AssertionError('las reglas debían salir de la caché')
+
+    monkeypatch.setattr(reglas, 'leer_archivo', no_usar)
+    monkeypatch.setattr(clasificacion, 'preparar_keywords', no_usar)
+    keywords_map = reglas.cargar_reglas('rm')['keywords_map']
+    patron_disco, tabla_disco = clasificacion.compilar_keywords(keywords_map)
+    assert patron_disco.pattern == patron.pattern
+    assert tabla_disco.equals(tabla)
+
+
+def test_reglas_compiladas_en_memoria_tienen_limite(monkeypatch):
+    from motor import clasificacion
+
+    monkeypatch.setattr(clasificacion, '_compiladas', OrderedDict())
+    primera = {'Facta': ['facta']}
+    clasificacion.compilar_keywords(primera)
+    for n in range(clasificacion.MAX_COMPILADAS + 5):
+        # Cada edición del archivo de reglas es un keywords_map distinto
+        clasificacion.compilar_keywords({'Facta': ['facta', f'version{n}']})
+    assert len(clasificacion._compiladas) == clasificacion.MAX_COMPILADAS
+    assert clasificacion._llave(primera) not in clasificacion._compiladas
@@ -0,0 +1,30 @@
+# =============================
+# Cliente del servicio: respaldo local
+# =============================
+import socket
+
+from motor import servicio
+
+
+def test_servicio_que_no_contesta_se_transforma_en_local(tmp_path, monkeypatch):
+    # Acepta conexiones (cola del sistema) pero nunca responde
+    escucha = socket.socket()
+    escucha.bind(('127.0.0.1', 0))
+    escucha.listen(1)
+    url = f'http://127.0.0.1:{escucha.getsockname()[1]}'
+    monkeypatch.setattr(servicio, 'TIEMPO_ESPERA_S', 0.5)
+
+    entrada = tmp_path / 'entrada.xlsx'
+    entrada.write_bytes(b'x' * 100)
+    llamadas = []
+
+    def local(ruta_entrada, ruta_salida):
+        llamadas.append((ruta_entrada, ruta_salida))
+        return {'local': True}
+
+    try:
+        reporte = servicio._remoto_o_local(url, 'rm', local, str(entrada), str(tmp_path / 'salida.xlsx'))
+    finally:
+        escucha.close()
+    assert reporte == {'local': True}
+    assert llamadas == [(str(entrada), str(tmp_path / 'salida.xlsx'))]